@@ -1,9 +1,9 @@
-import mysql
-from flask import session
 
-from utils import get_connection
+from utils import get_connection, call_on_commit
 from datetime import datetime, timedelta
 from flights_and_workers import Flight
+from seat_inventory import remove_sold_seats, clear_sold_seats
+from seat_occupancy import mark_free, invalidate_occupancy
 
 class Order:
     def __init__(self, total_amount, flight_id,
@@ -23,90 +23,6 @@ class Order:
         # { plane_id, class_type, seat_number }
         self.seats = []
 
-    # -----------------------------
-    # Save the order to Orders table
-    # -----------------------------
-    def save_to_db(self):
-        """
-        Save the order to the database.
-        Inserts NULL for guest_email if it's a registered user.
-        """
-        conn = get_connection("FLYTAU")
-        cursor = conn.cursor()
-
-        try:
-            print("CURRENT SESSION:", dict(session))
-
-            # --- Choose correct emails ---
-            if session["logged_in"]:
-                registered_email = session["user"]["email"]
-                guest_email = None
-            else:
-                guest_email = session["booking"]["customer"]["email"]
-                print(guest_email)
-                registered_email = None
-
-
-            # --- Insert order ---
-            cursor.execute("""
-                INSERT INTO Orders
-                (order_status, total_amount, guest_email, registered_email, flight_id, order_date)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                self.order_status,
-                self.total_amount,
-                guest_email,  # None if registered user
-                registered_email,  # None if guest
-                self.flight_id,
-                self.order_date
-            ))
-
-            conn.commit()
-            self.order_id = cursor.lastrowid
-
-        except mysql.connector.Error as e:
-            print("Database error:", e)
-            conn.rollback()
-            raise e
-        finally:
-            cursor.close()
-            conn.close()
-
-    # -----------------------------------
-    # Save all seats to booking_seats table
-    # -----------------------------------
-    def save_seats_to_db(self):
-        """
-        Saves each selected seat to booking_seats table.
-        booking_seats:
-        (order_id, plane_id, class_type, seat_number)
-        """
-
-        if self.order_id is None:
-            raise Exception("Order must be saved before saving seats")
-
-
-
-        conn = get_connection("FLYTAU")
-        cursor = conn.cursor()
-
-        for seat in self.seats:
-            cursor.execute("""
-                INSERT INTO Booking_Seats
-                (order_id, plane_id, class_type, seat_number)
-                VALUES (%s, %s, %s, %s)
-            """, (
-                self.order_id,
-                seat["plane_id"],
-                seat["class_type"],
-                seat["seat_number"]
-            ))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-
     # --- Update order status ---
     def update_status(self, new_status):
 
@@ -417,13 +333,21 @@ class Order:
             WHERE order_id=%s
         """, (self.order_status, self.total_amount, self.order_id))
 
-        # Remove seats from booking_seats
-        cursor.execute("DELETE FROM Booking_Seats WHERE order_id=%s", (self.order_id,))
+        # Release the seats in the flight's counters
+        cursor.execute("SELECT class_type, seat_number FROM Booking_Seats WHERE order_id=%s AND active=1",
+                       (self.order_id,))
+        released_seats = cursor.fetchall()
+        remove_sold_seats(cursor, self.flight_id, released_seats)
+
+        # The seats stay on the order but are free again
+        cursor.execute("UPDATE Booking_Seats SET active=0 WHERE order_id=%s", (self.order_id,))
 
         conn.commit()
         cursor.close()
         conn.close()
 
+        flight_id = self.flight_id
+        call_on_commit(lambda: mark_free(flight_id, [s["seat_number"] for s in released_seats]))
 
         return refund_amount, cancellation_fee
 
@@ -445,10 +369,16 @@ class Order:
                 WHERE flight_id = %s
             """, (flight_id,))
 
+        cursor.execute("UPDATE Booking_Seats SET active = 0 WHERE flight_id = %s", (flight_id,))
+
+        clear_sold_seats(cursor, flight_id)
+
         conn.commit()
         cursor.close()
         conn.close()
 
+        call_on_commit(lambda: invalidate_occupancy(flight_id))
+
 
 
 
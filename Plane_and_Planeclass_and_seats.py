@@ -2,7 +2,9 @@ from datetime import date
 from enum import Enum
 from typing import List
 from utils import get_connection
-from utils import get_connection
+from utils import get_connection, call_on_commit
+from seat_occupancy import get_flight_occupancy, invalidate_occupancy
+from seat_layout import get_seat_layout, invalidate_seat_layout
 
 # --- Enums ---
 class PlaneSize(Enum):
@@ -101,83 +103,33 @@ class Seat:
     @staticmethod
     def get_seats_for_plane(plane_id):
         """
-        Returns all Seat objects for a given plane.
-        Each seat is connected to its PlaneClass object.
+        Returns all seats of a given plane, in (row, column) order.
+        The seats come from the plane's cached layout (see seat_layout.py):
+        read-only objects with seat_number, row_number, column_letter and
+        class_type, shared by every request.
         This method DOES NOT care about availability.
         """
-
-        # Step 1: get all plane classes for this plane as a dictionary
-        # key = class_type, value = PlaneClass object
-        classes_map = PlaneClass.get_plane_classes_map(plane_id)
-
-        # Step 2: fetch all seats from DB
-        conn = get_connection("FLYTAU")
-        cursor = conn.cursor(dictionary=True)
-        query = """
-            SELECT plane_id, class_type, seat_number, rownumber, column_letter
-            FROM Seats
-            WHERE plane_id = %s
-            ORDER BY rownumber, column_letter
-        """
-        cursor.execute(query, (plane_id,))
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        # Step 3: create Seat objects and attach them to PlaneClass
-        seats = []
-        for row in rows:
-            plane_class_obj = classes_map.get(row["class_type"])
-
-            # Safety fallback (should normally not happen)
-            if not plane_class_obj:
-                plane_class_obj = PlaneClass(row["class_type"], 0, 0)
-                classes_map[row["class_type"]] = plane_class_obj
-
-            seat = Seat(
-                plane_id=row["plane_id"],
-                plane_class=plane_class_obj,
-                seat_number=row["seat_number"],
-                row_number=row["rownumber"],
-                column_letter=row["column_letter"]
-            )
-            seats.append(seat)
-
-        return seats
+        return get_seat_layout(plane_id).seats
 
     @staticmethod
-    def get_taken_seats_for_flight(flight_id):
+    def get_taken_seats_for_flight(flight_id, exclude_hold_token=None):
         """
         Returns a set of seat_numbers that are currently taken for a given flight.
 
         A seat is considered taken if:
         - It appears in Booking_Seats
         - And its order is still ACTIVE
+        - Or another customer holds it (live hold in Seat_Holds).
+          Holds of exclude_hold_token (the current customer) are not counted.
 
         If an order is cancelled (by customer or manager),
         the seat becomes available automatically.
+        Read from the flight's cached occupancy bitmap (see seat_occupancy.py).
         """
-
-        conn = get_connection("FLYTAU")
-        cursor = conn.cursor(dictionary=True)
-
-        query = """
-            SELECT bs.seat_number
-            FROM Booking_Seats bs
-            JOIN Orders o ON o.order_id = bs.order_id
-            WHERE o.flight_id = %s
-              AND o.order_status IN ('ACTIVE', 'COMPLETED')
-        """
-
-        cursor.execute(query, (flight_id,))
-        rows = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
-
-        # Convert list of dicts into a set for fast lookup
-        taken_seats = {row["seat_number"] for row in rows}
-        return taken_seats
+        occupancy = get_flight_occupancy(flight_id)
+        if occupancy is None:
+            return set()
+        return occupancy.taken_seat_numbers(exclude_hold_token)
 
 
 
@@ -243,3 +195,8 @@ class Planes:
         cursor.close()
         conn.close()
 
+        # The plane's seats may have changed -> drop its cached layout and
+        # the occupancy bitmaps built on top of it
+        plane_id = self.plane_id
+        call_on_commit(lambda: (invalidate_seat_layout(plane_id), invalidate_occupancy()))
+
@@ -1,7 +1,8 @@
 import re
+import uuid
 from collections import defaultdict
 
-from flask import Flask, render_template, request, redirect, session, url_for, flash
+from flask import Flask, render_template, request, redirect, session, url_for, flash, jsonify
 from datetime import datetime, timedelta, date
 
 from six import class_types
@@ -11,15 +12,28 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from Customers import Registered, Guest
 from Orders import Order
 from Plane_and_Planeclass_and_seats import Seat
-from utils import get_connection, is_expiry_valid
+from utils import get_connection, is_expiry_valid, init_request_db, call_on_commit
+from checkout import checkout, SeatConflictError
+from seat_inventory import EXPIRED_HOLDS_BY_FLIGHT
+from seat_holds import hold_seats, release_holds, start_hold_sweeper
+from seat_occupancy import get_flight_occupancy
+from seat_layout import get_seat_layout
 from flights_and_workers import Flight
+from route_catalog import get_route_catalog, get_route_minutes
+from flight_status import start_flight_status_scheduler, notify_flights_changed
 from func_for_flights import (
-    get_available_planes,
-    get_available_attendants,
-    get_available_pilots,
     get_required_crew_by_plane,
     get_required_crew_by_duration
 )
+from crew_assignment import auto_assign_crew
+from schedule_generator import create_recurring_flights
+from availability_cache import (
+    set_availability_engine,
+    bump_schedule_version,
+    get_availability_snapshot,
+    get_available_attendants_cached,
+    get_available_pilots_cached
+)
 
 from reports import (
     report_avg_capacity,
@@ -36,9 +50,50 @@ app.config.update(
     SESSION_PERMANENT=True,
     PERMANENT_SESSION_LIFETIME=timedelta(minutes=30),
     SESSION_REFRESH_EACH_REQUEST=True,
-    SESSION_COOKIE_SECURE=True
+    SESSION_COOKIE_SECURE=True,
+    FLIGHTS_BOARD_PAGE_SIZE=50,
+    CANCEL_FLIGHT_PAGE_SIZE=50,
+    AVAILABILITY_ENGINE="python",  # "python" or "sql"
+    BACKGROUND_JOBS=True  # False in tests / scripts that serve requests
 )
 
+# One DB connection + transaction per request, shared by all model calls
+init_request_db(app)
+
+# Plane / crew availability engine for the create-flight wizard
+set_availability_engine(app.config["AVAILABILITY_ENGINE"])
+
+
+def start_background_jobs():
+    """
+    Background threads of the web app (once per process):
+    - flight statuses are advanced in the background, routes only read them
+    - expired seat holds are released in the background
+    Not started on import, so scripts and tests that import this module
+    don't open DB threads.
+    """
+    start_flight_status_scheduler()
+    start_hold_sweeper()
+
+
+@app.before_request
+def _ensure_background_jobs():
+    # WSGI servers import the app without running __main__
+    if app.config["BACKGROUND_JOBS"]:
+        start_background_jobs()
+
+
+# Columns the manager flights board can be sorted by
+FLIGHTS_BOARD_SORT_COLUMNS = {
+    "flight_id", "departure_datetime", "origin", "destination", "flight_status"
+}
+
+def get_hold_token():
+    """Seat-hold token of the current booking funnel (one per session)."""
+    if "hold_token" not in session:
+        session["hold_token"] = uuid.uuid4().hex
+    return session["hold_token"]
+
 
 # Steps for the progress bar
 STEPS = [
@@ -48,62 +103,6 @@ STEPS = [
     "תשלום"
 ]
 
-def update_flight_status():
-    conn = get_connection("FLYTAU")
-    cursor = conn.cursor(dictionary=True)
-
-    # טיסות רלוונטיות Scheduled
-    cursor.execute("""
-        SELECT f.flight_id, f.departure_datetime, f.plane_id, f.flight_status
-        FROM Flights f
-        WHERE f.flight_status = 'Scheduled'
-    """)
-    flights = cursor.fetchall()
-
-    for flight in flights:
-        flight_id = flight['flight_id']
-        plane_id = flight['plane_id']
-        departure = flight['departure_datetime']
-        new_status = None
-
-        # בדיקה אם הטיסה כבר קרתה
-        if departure < datetime.now():
-            new_status = 'Occurred'
-        else:
-            # בדיקה אם הטיסה מלאה
-            cursor.execute("""
-                SELECT COUNT(*) AS booked_count
-                FROM Booking_Seats
-                WHERE order_id IN (
-                    SELECT order_id FROM Orders WHERE flight_id = %s AND order_status IN ('ACTIVE','COMPLETED')
-                )
-            """, (flight_id,))
-            booked_count = cursor.fetchone()['booked_count']
-
-            # ספירת מושבים של המטוס
-            cursor.execute("""
-                SELECT SUM(rows_number * columns_number) AS total_seats
-                FROM Plane_Class
-                WHERE plane_id = %s
-            """, (plane_id,))
-            total_seats = cursor.fetchone()['total_seats']
-
-            if booked_count >= total_seats:
-                new_status = 'Fully_Booked'
-
-        # עדכון אם צריך
-        if new_status:
-            cursor.execute("""
-                UPDATE Flights
-                SET flight_status = %s
-                WHERE flight_id = %s
-            """, (new_status, flight_id))
-
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-
 # @app.route("/")
 # def root():
 #     return redirect(url_for("homepage"))
@@ -162,21 +161,13 @@ def dashboard():
 # Create Flight - Step 1 (Flight Details)
 # ======================================================
 def get_route_data():
-    """פונקציית עזר לשליפת היעדים והמקורות מהדאטה-בייס"""
-    conn = get_connection("FLYTAU")
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT origin FROM Route ORDER BY origin")
-    origins = [row[0] for row in cursor.fetchall()]
-    cursor.execute("SELECT DISTINCT destination FROM Route ORDER BY destination")
-    destinations = [row[0] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
-    return origins, destinations
+    """פונקציית עזר לשליפת היעדים והמקורות מקטלוג המסלולים"""
+    catalog = get_route_catalog()
+    return list(catalog.origins), list(catalog.destinations)
 
 
 @app.route("/create-flight", methods=["GET", "POST"])
 def create_flight():
-    update_flight_status()
     if "manager" not in session:
         return redirect(url_for("homepage"))
 
@@ -206,17 +197,12 @@ def create_flight():
         destination = data["destination"]
 
         # ---- בדיקת קיום מסלול ----
-        conn = get_connection("FLYTAU")
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT minutes FROM Route WHERE origin = %s AND destination = %s", (origin, destination))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        minutes = get_route_minutes(origin, destination)
 
-        if not row:
+        if minutes is None:
             return return_error("לא ניתן ליצור טיסה זו כי אין זמן טיסה מוגדר בין היעדים.")
 
-        duration_hours = row["minutes"] / 60.0
+        duration_hours = minutes / 60.0
         is_long_flight = duration_hours > 6
 
         # ---- וולידציית מחירים ----
@@ -241,13 +227,16 @@ def create_flight():
             return return_error("לא ניתן לבחור תאריך שעבר.")
 
         # ---- בדיקת מטוסים וצוות ----
-        planes = get_available_planes(origin, destination, departure_datetime)
+        # Snapshot is reused by select_crew / finalize_flight for the same slot
+        availability = get_availability_snapshot(origin, destination, departure_datetime, is_long_flight)
+        app.logger.debug("availability timings (s): %s", availability["timings"])
+        planes = availability["planes"]
         if not planes:
             return return_error("אין מטוסים פנויים במועד זה.")
 
         required_attendants, required_pilots = get_required_crew_by_duration(duration_hours)
-        attendants = get_available_attendants(departure_datetime, origin, destination, is_long_flight)
-        pilots = get_available_pilots(departure_datetime, origin, destination, is_long_flight)
+        attendants = availability["attendants"]
+        pilots = availability["pilots"]
 
         if len(attendants) < required_attendants or len(pilots) < required_pilots:
             return return_error("אין מספיק אנשי צוות פנויים לטיסה זו.")
@@ -288,18 +277,12 @@ def select_crew():
     departure_datetime = datetime.fromisoformat(session["departure_datetime"])
 
 
-    # 2. פתיחת חיבור יחיד למסד הנתונים לשליפת כל המידע החסר
+    # שליפת משך הטיסה מקטלוג המסלולים
+    route_minutes = get_route_minutes(data["origin"], data["destination"])
+
+    # 2. שליפת גודל המטוס (הוספה חדשה)
     conn = get_connection("FLYTAU")
     cursor = conn.cursor(dictionary=True)
-
-    # שליפת משך הטיסה מהמסלול
-    cursor.execute("""
-        SELECT minutes FROM Route
-        WHERE origin = %s AND destination = %s
-    """, (data["origin"], data["destination"]))
-    route_row = cursor.fetchone()
-
-    # שליפת גודל המטוס (הוספה חדשה)
     cursor.execute("SELECT size FROM Planes WHERE plane_id = %s", (plane_id,))
     plane_row = cursor.fetchone()
 
@@ -307,10 +290,10 @@ def select_crew():
     conn.close()
 
     # 3. בדיקת תקינות נתונים
-    if not route_row:
+    if route_minutes is None:
         return f"Error: Route {data['origin']} to {data['destination']} not found.", 400
 
-    duration_hours = route_row["minutes"] / 60
+    duration_hours = route_minutes / 60
     plane_size = plane_row["size"] if plane_row else "Unknown"
 
     def safe_float(val):
@@ -337,6 +320,7 @@ def select_crew():
         int(plane_id)
     )
     flight.send_to_db()
+    call_on_commit(notify_flights_changed)
 
     # 4. שמירה ב-Session להמשך התהליך
     session["created_flight_id"] = flight.flight_id
@@ -350,28 +334,125 @@ def select_crew():
     # שימוש בפרמטר duration_hours שחושב פעם אחת בלבד
     is_long = (duration_hours > 6)
 
-    attendants = get_available_attendants(
+    attendants = get_available_attendants_cached(
         departure_datetime,
         origin=data["origin"],
         destination=data["destination"],
         is_long_flight=is_long
     )
 
-    pilots = get_available_pilots(
+    pilots = get_available_pilots_cached(
         departure_datetime,
         origin=data["origin"],
         destination=data["destination"],
         is_long_flight=is_long
     )
 
+    # הצעת צוות אוטומטית (מסומנת מראש בטופס)
+    suggestion = auto_assign_crew(
+        data["origin"], data["destination"], departure_datetime,
+        required_attendants, required_pilots, is_long
+    )
+
     return render_template(
         "select_crew.html",
         attendants=attendants,
         pilots=pilots,
         required_attendants=required_attendants,
         required_pilots=required_pilots,
-        plane_size=plane_size  # מעבירים ל-HTML כדי להציג "Large" או "Small"
+        plane_size=plane_size,  # מעבירים ל-HTML כדי להציג "Large" או "Small"
+        suggested_attendant_ids=suggestion["attendant_ids"],
+        suggested_pilot_ids=suggestion["pilot_ids"]
+    )
+
+
+@app.route("/auto-assign-crew")
+def auto_assign_crew_route():
+    """
+    Suggested crew for the flight currently being created (JSON).
+    """
+    if (
+        "manager" not in session or
+        "flight_data" not in session or
+        "selected_plane_id" not in session
+    ):
+        return jsonify({"error": "no flight in progress"}), 400
+
+    data = session["flight_data"]
+    required_attendants, required_pilots = get_required_crew_by_plane(session["selected_plane_id"])
+    minutes = get_route_minutes(data["origin"], data["destination"])
+
+    suggestion = auto_assign_crew(
+        data["origin"], data["destination"],
+        datetime.fromisoformat(session["departure_datetime"]),
+        required_attendants, required_pilots,
+        is_long_flight=minutes is not None and minutes > 360
     )
+    return jsonify(suggestion)
+
+
+@app.route("/bulk-schedule", methods=["POST"])
+def bulk_schedule():
+    """
+    Creates a recurring schedule in one go (JSON).
+    Fields: origin, destination, weekdays (0=Mon .. 6=Sun, repeated),
+            time (HH:MM), start_date, end_date, regular_price, business_price.
+    """
+    if "manager" not in session:
+        return jsonify({"error": "unauthorized"}), 403
+
+    # ---- price validation (same rules as create_flight) ----
+    try:
+        regular_price = float(request.values["regular_price"])
+        business_price = (float(request.values["business_price"])
+                          if request.values.get("business_price") else None)
+    except (KeyError, ValueError):
+        return jsonify({"error": "regular_price is missing or not a number"}), 400
+    if regular_price <= 0 or (business_price is not None and business_price <= 0):
+        return jsonify({"error": "prices must be positive"}), 400
+
+    minutes = get_route_minutes(request.values.get("origin"), request.values.get("destination"))
+    if minutes is not None and minutes > 360 and business_price is None:
+        return jsonify({"error": "business_price is required for long flights"}), 400
+
+    # ---- weekdays and date range ----
+    try:
+        weekdays = [int(d) for d in request.values.getlist("weekdays")]
+        start_date = date.fromisoformat(request.values["start_date"])
+        end_date = date.fromisoformat(request.values["end_date"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "weekdays, start_date and end_date are required"}), 400
+    if not weekdays or any(d < 0 or d > 6 for d in weekdays):
+        return jsonify({"error": "weekdays must be between 0 (Mon) and 6 (Sun)"}), 400
+    if start_date > end_date:
+        return jsonify({"error": "start_date must not be after end_date"}), 400
+
+    # Validation errors are raised before anything is written, and the
+    # flights are saved on their own connection (all or nothing)
+    try:
+        result = create_recurring_flights(
+            request.values["origin"],
+            request.values["destination"],
+            weekdays,
+            request.values["time"],
+            start_date,
+            end_date,
+            regular_price,
+            business_price
+        )
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    if result["conflicts"]:
+        return jsonify({"error": "conflict", "conflicts": result["conflicts"]}), 409
+
+    return jsonify({
+        "flight_ids": result["flight_ids"],
+        "unstaffed": [
+            {"date": u["date"].isoformat(), "reason": u["reason"]}
+            for u in result["unstaffed"]
+        ]
+    })
 
 
 # ======================================================
@@ -398,34 +479,20 @@ def finalize_flight():
     pilot_ids = request.form.getlist("pilot_ids")
 
     # Recalculate required crew to prevent client-side manipulation
-    # Calculate flight duration directly from DB
-    conn = get_connection("FLYTAU")
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT minutes
-        FROM Route
-        WHERE origin = %s AND destination = %s
-    """, (
+    # Calculate flight duration from the Route catalog
+    duration_hours = get_route_minutes(
         session["flight_data"]["origin"],
         session["flight_data"]["destination"]
-    ))
-
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-
-    duration_hours = row["minutes"] / 60
+    ) / 60
     # Recalculate required crew based on the selected plane
     required_attendants, required_pilots = get_required_crew_by_plane(session["selected_plane_id"])
 
-    # Validate crew count
-    if (
-        len(attendant_ids) != required_attendants or
-        len(pilot_ids) != required_pilots
-    ):
-        attendants = get_available_attendants(departure_datetime)
-        pilots = get_available_pilots(departure_datetime)
+    def crew_error(msg):
+        origin = session["flight_data"]["origin"]
+        destination = session["flight_data"]["destination"]
+        is_long = duration_hours > 6
+        attendants = get_available_attendants_cached(departure_datetime, origin, destination, is_long)
+        pilots = get_available_pilots_cached(departure_datetime, origin, destination, is_long)
 
         return render_template(
             "select_crew.html",
@@ -433,9 +500,16 @@ def finalize_flight():
             pilots=pilots,
             required_attendants=required_attendants,
             required_pilots=required_pilots,
-            error="Incorrect number of crew members selected"
+            error=msg
         )
 
+    # Validate crew count
+    if (
+        len(attendant_ids) != required_attendants or
+        len(pilot_ids) != required_pilots
+    ):
+        return crew_error("Incorrect number of crew members selected")
+
     # Assign crew to flight using flight_id
     reg_price = float(session["flight_data"]["regular_price"])  # בטוח קיים
     bus_price = session["flight_data"].get("business_price")  # יכול להיות None
@@ -453,8 +527,15 @@ def finalize_flight():
     # Manually set existing flight id
     flight.flight_id = flight_id
 
-    flight.assign_attendants([int(a) for a in attendant_ids])
-    flight.assign_pilots([int(p) for p in pilot_ids])
+    # Locks the crew, re-checks their schedules and assigns everyone at once
+    conflicts = flight.assign_crew(
+        [int(a) for a in attendant_ids],
+        [int(p) for p in pilot_ids]
+    )
+    if conflicts:
+        # Someone was booked meanwhile -> show fresh lists
+        bump_schedule_version("crew")
+        return crew_error("Some crew members are no longer available: " + "; ".join(conflicts))
 
     # Clear session data related to flight creation
     session.pop("flight_data", None)
@@ -466,31 +547,42 @@ def finalize_flight():
 
 @app.route("/cancel-flight", methods=["GET", "POST"])
 def cancel_flight_route():
-    update_flight_status()
     if "manager" not in session:
         return redirect(url_for("homepage"))
 
-    flights = Flight.get_all()
+    page_size = app.config["CANCEL_FLIGHT_PAGE_SIZE"]
+    after = Flight.decode_cursor(request.args.get("after"))
+
+    def render_page(**kwargs):
+        flights, next_cursor = Flight.list_cancellable(after=after, limit=page_size)
+        return render_template(
+            "cancel_flight.html",
+            flights=flights,
+            next_cursor=Flight.encode_cursor(next_cursor),
+            is_first_page=after is None,
+            **kwargs
+        )
 
     if request.method == "POST":
         flight_id = request.form.get("flight_id")
         data = Flight.get_by_id(flight_id)
 
         if not data:
-            return render_template("cancel_flight.html", flights=flights, error="טיסה לא נמצאה")
+            return render_page(error="טיסה לא נמצאה")
 
         dep_time = data["departure_datetime"]
 
         if not Flight.can_cancel(dep_time):
-            return render_template("cancel_flight.html", flights=flights, error="ניתן לבטל רק עד 72 שעות לפני")
+            return render_page(error="ניתן לבטל רק עד 72 שעות לפני")
 
         Flight.cancel_flight(flight_id)
 
         Order.refund_orders_by_flight(flight_id)
+        call_on_commit(notify_flights_changed)
 
-        return render_template("cancel_flight.html", flights=Flight.get_all(), success="טיסה בוטלה בהצלחה")
+        return render_page(success="טיסה בוטלה בהצלחה")
 
-    return render_template("cancel_flight.html", flights=flights)
+    return render_page()
 
 
 @app.route("/reports-dashboard")
@@ -514,50 +606,70 @@ def flights_board():
     if "manager" not in session:
         return redirect(url_for("homepage"))
 
-    conn = get_connection("FLYTAU")
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT DISTINCT origin FROM Route ORDER BY origin")
-    origins_list = [row['origin'] for row in cursor.fetchall()]
+    origins_list, destinations_list = get_route_data()
 
-    cursor.execute("SELECT DISTINCT destination FROM Route ORDER BY destination")
-    destinations_list = [row['destination'] for row in cursor.fetchall()]
-    # ---------------------------------------------
+    # --- סינונים (GET לקישורי עמודים, POST מהטופס) ---
+    filters = {
+        "date": request.values.get("date", ""),
+        "origin": request.values.get("origin", ""),
+        "destination": request.values.get("destination", ""),
+        "status": request.values.get("status", "")
+    }
 
-    # --- בסיס השאילתה ---
-    query = """
-        SELECT flight_id, departure_datetime, origin, destination,
-               flight_status, regular_price, business_price, plane_id
-        FROM Flights
-        WHERE 1 = 1
-    """
+    where = " WHERE 1 = 1"
     params = []
 
-    # --- סינונים ---
-    if request.method == "POST":
-        date = request.form.get("date")
-        origin = request.form.get("origin")
-        destination = request.form.get("destination")
-        status = request.form.get("status")
-
-        if date:
-            query += " AND DATE(departure_datetime) = %s"
-            params.append(date)
-
-        if origin:
-            query += " AND origin = %s"
-            params.append(origin)
+    if filters["date"]:
+        # Half-open range keeps the departure_datetime index usable
+        try:
+            day_start = datetime.strptime(filters["date"], "%Y-%m-%d")
+        except ValueError:
+            day_start = None
+        if day_start:
+            where += " AND departure_datetime >= %s AND departure_datetime < %s"
+            params += [day_start, day_start + timedelta(days=1)]
+
+    if filters["origin"]:
+        where += " AND origin = %s"
+        params.append(filters["origin"])
+
+    if filters["destination"]:
+        where += " AND destination = %s"
+        params.append(filters["destination"])
+
+    if filters["status"]:
+        where += " AND flight_status = %s"
+        params.append(filters["status"])
+
+    # --- מיון ועימוד ---
+    sort = request.values.get("sort", "departure_datetime")
+    if sort not in FLIGHTS_BOARD_SORT_COLUMNS:
+        sort = "departure_datetime"
+    direction = "asc" if request.values.get("dir") == "asc" else "desc"
+
+    page_size = app.config["FLIGHTS_BOARD_PAGE_SIZE"]
+    try:
+        page = max(int(request.values.get("page", 1)), 1)
+    except ValueError:
+        page = 1
 
-        if destination:
-            query += " AND destination = %s"
-            params.append(destination)
+    conn = get_connection("FLYTAU")
+    cursor = conn.cursor(dictionary=True)
 
-        if status:
-            query += " AND flight_status = %s"
-            params.append(status)
+    cursor.execute("SELECT COUNT(*) AS total FROM Flights" + where, params)
+    total = cursor.fetchone()["total"]
+    total_pages = max((total + page_size - 1) // page_size, 1)
+    page = min(page, total_pages)
 
-    # --- שליפת נתונים ---
-    cursor.execute(query, params)
+    # --- שליפת נתונים (עמוד אחד בלבד) ---
+    cursor.execute(f"""
+        SELECT flight_id, departure_datetime, origin, destination,
+               flight_status, regular_price, business_price, plane_id
+        FROM Flights
+        {where}
+        ORDER BY {sort} {direction}, flight_id {direction}
+        LIMIT %s OFFSET %s
+    """, params + [page_size, (page - 1) * page_size])
     flights = cursor.fetchall()
     cursor.close()
     conn.close()
@@ -574,7 +686,13 @@ def flights_board():
         flights=flights,
         statuses=statuses,
         origins=origins_list,  # הוספה
-        destinations=destinations_list  # הוספה
+        destinations=destinations_list,  # הוספה
+        filters=filters,
+        sort=sort,
+        direction=direction,
+        page=page,
+        total_pages=total_pages,
+        total=total
     )
 
 
@@ -584,7 +702,6 @@ def flights_board():
 # ======================================================
 @app.route("/logout")
 def logout():
-    update_flight_status()
     session.pop("manager", None)
     session.pop("manager_id", None)
     session.pop("manager_name", None)
@@ -600,20 +717,8 @@ def homepage():
     min_date = now.date()
     max_date = now.date() + timedelta(days=365)
 
-    # --- Connect to DB and fetch routes ---
-    conn = get_connection("FLYTAU")
-    cursor = conn.cursor()
-
-    # Fetch distinct origins
-    cursor.execute("SELECT DISTINCT origin FROM Route WHERE origin IS NOT NULL AND origin != '' ORDER BY origin")
-    origins = [row[0] for row in cursor.fetchall()]
-
-    cursor.execute(
-        "SELECT DISTINCT destination FROM Route WHERE destination IS NOT NULL AND destination != '' ORDER BY destination")
-    destinations = [row[0] for row in cursor.fetchall()]
-
-    cursor.close()
-    conn.close()
+    # --- Fetch routes from the in-memory catalog ---
+    origins, destinations = get_route_data()
 
     # --- Render template with variables ---
     return render_template(
@@ -656,60 +761,41 @@ def search_flights():
         flash("אופס, נראה שהמקור והיעד בחרתם זהים", category="error")
         return redirect(url_for("homepage"))
 
+    # Half-open day range keeps the departure_datetime index usable
+    try:
+        day_start = datetime.strptime(departure_date, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        flash("תאריך היציאה אינו תקין", category="error")
+        return redirect(url_for("homepage"))
+    day_end = day_start + timedelta(days=1)
+
 
 
     conn = get_connection("FLYTAU")
     cursor = conn.cursor(dictionary=True)
 
-   #choose flies by destination, origin, date
-    cursor.execute("""
+    # One round-trip: matching flights + free seats + arrival time.
+    # Free seats come from the per-flight inventory counters (PK lookup);
+    # holds that expired but were not swept yet are given back.
+    cursor.execute(f"""
         SELECT f.flight_id, f.departure_datetime, f.origin, f.destination,
-               f.regular_price, f.business_price, f.plane_id
+               f.regular_price, f.business_price, f.plane_id,
+               DATE_ADD(f.departure_datetime,
+                        INTERVAL ROUND(COALESCE(r.minutes, 0) * 60) SECOND) AS arrival_datetime
         FROM Flights f
+        JOIN Flight_Inventory fi ON fi.flight_id = f.flight_id
+        LEFT JOIN Route r ON r.origin = f.origin AND r.destination = f.destination
+        LEFT JOIN ({EXPIRED_HOLDS_BY_FLIGHT}) eh ON eh.flight_id = f.flight_id
         WHERE f.origin = %s AND f.destination = %s
-          AND DATE(f.departure_datetime) = %s
+          AND f.departure_datetime >= %s AND f.departure_datetime < %s
           AND f.flight_status = 'Scheduled'
           AND f.departure_datetime > NOW()
-    """, (origin, destination, departure_date))
-
-    flights = cursor.fetchall()
-    results = []
+        GROUP BY f.flight_id, r.minutes, eh.expired_holds
+        HAVING SUM(fi.capacity - fi.sold - fi.held) + COALESCE(eh.expired_holds, 0) >= %s
+        ORDER BY f.departure_datetime
+    """, (origin, destination, day_start, day_end, passengers))
 
-    for flight in flights:
-        # check how much free seats
-        cursor.execute("""
-            SELECT SUM(pc.rows_number * pc.columns_number) AS total_seats
-            FROM Plane_Class pc
-            WHERE pc.plane_id = %s
-        """, (flight['plane_id'],))
-        plane_info = cursor.fetchone()
-        total_seats = plane_info['total_seats'] or 0
-
-        cursor.execute("""
-            SELECT COUNT(bs.seat_number) AS occupied_seats
-            FROM Booking_Seats bs
-            JOIN Orders o ON o.order_id = bs.order_id
-            WHERE o.flight_id = %s AND o.order_status = 'ACTIVE'
-        """, (flight['flight_id'],))
-        occupied_info = cursor.fetchone()
-        occupied_seats = occupied_info['occupied_seats'] or 0
-
-        available_seats = total_seats - occupied_seats
-
-        if available_seats >= passengers:
-
-            #  using 'minutes' from route table
-            cursor.execute("""
-                SELECT minutes
-                FROM Route
-                WHERE origin = %s AND destination = %s
-            """, (flight['origin'], flight['destination']))
-            route_info = cursor.fetchone()
-            minutes = route_info['minutes'] if route_info else 0
-
-            flight['arrival_datetime'] = flight['departure_datetime'] + timedelta(minutes=minutes)
-
-            results.append(flight)
+    results = cursor.fetchall()
 
     cursor.close()
     conn.close()
@@ -721,8 +807,8 @@ def search_flights():
 
 @app.route("/book-flight", methods=["POST"])
 def book_flight():
-    # Get flight_id and passengers from form
-    flight_id = request.form.get("flight_id")
+    # Get flight_id and passengers from form (ids are ints everywhere else)
+    flight_id = int(request.form.get("flight_id"))
     passengers = request.form.get("passengers")
     departure_datetime = request.form.get("departure_datetime")
     arrival_datetime = request.form.get("arrival_datetime")
@@ -748,6 +834,10 @@ def book_flight():
     plane_id = data['plane_id']
     duration = flight.get_duration_hours()
 
+    # A new booking starts -> seats held for a previous one are released
+    if "hold_token" in session:
+        release_holds(session["hold_token"])
+
     # Save flight info in session['booking']
     session['booking'] = {
         "plane_id": plane_id,
@@ -1129,17 +1219,17 @@ def select_seat():
 
     plane_id = flight["plane_id"]
 
-    # --- get all seats of the plane ---
-    seats = Seat.get_seats_for_plane(plane_id)
+    # --- the plane's seat layout (cached, shared by all requests) ---
+    layout = get_seat_layout(plane_id)
 
-    # --- get taken seats for this flight ---
-    taken_seats = Seat.get_taken_seats_for_flight(flight_id)
+    # --- taken seats for this flight (sold + held by other customers), as a bitmap ---
+    hold_token = get_hold_token()
+    occupancy = get_flight_occupancy(flight_id, plane_id)
+    taken_bits = occupancy.taken_bits(hold_token)
 
-    # --- organize seats by rows ---
-    from collections import defaultdict
-    rows = defaultdict(list)
-    for seat in seats:
-        rows[seat.row_number].append(seat)
+    def is_taken(seat_number):
+        position = layout.positions.get(seat_number)
+        return position is not None and bool(taken_bits >> position & 1)
 
     # --- Seats already selected in session ---
     booking = session.get("booking", {})
@@ -1151,7 +1241,7 @@ def select_seat():
         selected = request.form.getlist("seat_number")
 
         # Remove seats that are already taken (extra safety)
-        selected = [s for s in selected if s not in taken_seats]
+        selected = [s for s in selected if not is_taken(s)]
 
         # 🔸 Save current selection in session so it won't be lost on errors
         booking["seat_numbers"] = selected
@@ -1171,30 +1261,16 @@ def select_seat():
             )
             return redirect(url_for("select_seat"))
 
-        # 3️⃣ Re-check availability in the database (race condition protection)
-        taken_seats_now = Seat.get_taken_seats_for_flight(flight_id)
-        conflict = set(selected) & set(taken_seats_now)
-
-        if conflict:
-            flash(
-                "אחד או יותר מהמושבים שבחרתם נתפסו בינתיים. "
-                "אנא בחרו מושבים אחרים.",
-                "error"
-            )
-            return redirect(url_for("select_seat"))
-
         # All validations passed – now we finalize the booking seats
 
-        seat_map = {s.seat_number: s for s in seats}
-
         selected_seats = []
         business_count = 0
         economy_count = 0
 
         for seat_num in selected:
-            seat_obj = seat_map.get(seat_num)
+            seat_obj = layout.get(seat_num)
             if seat_obj:
-                class_type = seat_obj.plane_class.class_type
+                class_type = seat_obj.class_type
 
                 selected_seats.append({
                     "seat_number": seat_num,
@@ -1206,6 +1282,17 @@ def select_seat():
                 else:
                     economy_count += 1
 
+        # 3️⃣ Hold the seats until payment (race condition protection)
+        try:
+            hold_seats(flight_id, selected_seats, hold_token)
+        except SeatConflictError:
+            flash(
+                "אחד או יותר מהמושבים שבחרתם נתפסו בינתיים. "
+                "אנא בחרו מושבים אחרים.",
+                "error"
+            )
+            return redirect(url_for("select_seat"))
+
         booking["seats"] = selected_seats
         booking["business_seats_count"] = business_count
         booking["economy_seats_count"] = economy_count
@@ -1217,20 +1304,11 @@ def select_seat():
 
         return redirect(url_for("summary"))
 
-    # --- prepare seat_map for template ---
-    seat_map = {}
-    for seat in seats:
-        seat_map[seat.seat_number] = {
-            "column_letter": seat.column_letter,
-            "is_taken": seat.seat_number in taken_seats,
-            "class_type": seat.plane_class.class_type
-        }
-
     return render_template(
         "select_seat.html",
-        rows=rows,
+        rows=layout.rows,
         selected_seat_numbers=selected_seat_numbers,
-        seat_map=seat_map,
+        is_taken=is_taken,
         passengers_count=passengers_count,
         current_step=2
     )
@@ -1284,8 +1362,9 @@ def payment():
         booking = session["booking"]
 
         # 1. Determine if the customer is registered or a guest
-        if booking["customer"].get("is_registered"):
-            email_registered = booking["customer"]["email"]
+        #    (the logged-in user wins)
+        if session.get("logged_in"):
+            email_registered = session["user"]["email"]
             email_guest = None
         else:
             email_registered = None
@@ -1301,10 +1380,7 @@ def payment():
             order_date = datetime.now().strftime("%Y-%m-%d")
         )
 
-        # 3. Save order to DB
-        order.save_to_db()
-
-        # 4. Add seats to the order object
+        # 3. Add seats to the order object
         # booking["seat_numbers"] example: ["12A", "12B"]
         for seat in booking["seats"]:
             order.seats.append({
@@ -1313,13 +1389,33 @@ def payment():
                 "seat_number": seat["seat_number"]
             })
 
-        # 5. Save seats to booking_seats table
-        order.save_seats_to_db()
+        # 4. Save order + seats in one transaction
+        try:
+            checkout(order, hold_token=session.get("hold_token"))
+        except SeatConflictError as e:
+            app.logger.info("checkout conflict: %s", e.to_dict())
+            if e.reason == "flight_not_bookable":
+                flash("לא ניתן להזמין טיסה זו יותר. אנא בחרו טיסה אחרת.", "error")
+                return redirect(url_for("homepage"))
+
+            # Drop the lost seats and send the customer back to choose again
+            booking["seat_numbers"] = [
+                s for s in booking.get("seat_numbers", []) if s not in e.seat_numbers
+            ]
+            booking.pop("seats", None)
+            session["booking"] = booking
+            flash(
+                "המושבים " + ", ".join(e.seat_numbers) + " נתפסו בינתיים. "
+                "אנא בחרו מושבים אחרים.",
+                "error"
+            )
+            return redirect(url_for("select_seat"))
+        call_on_commit(notify_flights_changed)
 
-        # 6. Optional: store order_id in session (nice for confirmation page)
+        # 5. Optional: store order_id in session (nice for confirmation page)
         session["order_id"] = order.order_id
 
-        # 7. Redirect to confirmation page
+        # 6. Redirect to confirmation page
         return redirect(url_for("confirmation"))
 
     # GET request
@@ -1358,6 +1454,10 @@ def confirmation():
 @app.route("/customer-logout")
 def customer_logout():
 
+        # משחרר מושבים שהוחזקו בתהליך ההזמנה
+        if "hold_token" in session:
+            release_holds(session.pop("hold_token"))
+
         session.pop("user", None)  # מוחק את פרטי המשתמש
         session["logged_in"] = False  # או session.pop("logged_in", None)
         session.pop("booking", None)
@@ -1488,6 +1588,7 @@ def cancel_booking(order_id):
         # Process cancellation
         try:
             refund_amount, cancellation_fee = booking.cancel_order()
+            call_on_commit(notify_flights_changed)
             # Pass ready-to-display numbers to template
             return render_template("cancel_success.html",
                                    booking=booking,
@@ -1556,5 +1657,6 @@ def my_bookings():
 
 
 if __name__ == "__main__":
+    start_background_jobs()
     app.run(debug=True)
 
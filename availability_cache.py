@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import call_on_commit, POOL_CONFIG
+from route_catalog import get_route_catalog, get_route_catalog_version
+from func_for_flights import (
+    get_available_planes,
+    get_available_attendants,
+    get_available_pilots
+)
+from availability_sql import (
+    get_available_planes_sql,
+    get_available_attendants_sql,
+    get_available_pilots_sql
+)
+
+
+# ==============================
+# Availability snapshots for the create-flight wizard
+# ==============================
+# create_flight, select_crew and finalize_flight ask the same availability
+# questions for the same (origin, destination, departure_datetime).
+# Results are cached per process and keyed by a schedule version:
+#   - "plane": bumped when a flight is created or cancelled
+#   - "crew":  bumped when crew is assigned or a flight is cancelled
+# Versions are bumped only after the write is committed. The TTL bounds how
+# long a snapshot can miss writes made by other worker processes.
+
+SNAPSHOT_TTL_SECONDS = 60
+SNAPSHOT_MAX_ENTRIES = 128
+
+# Availability engines: "python" (func_for_flights loops) or "sql" (window functions).
+# Both return the same shape; switch with set_availability_engine() to compare them.
+AVAILABILITY_ENGINES = {
+    "python": (get_available_planes, get_available_attendants, get_available_pilots),
+    "sql": (get_available_planes_sql, get_available_attendants_sql, get_available_pilots_sql),
+}
+_engine = "python"
+
+# Bounded pool for computing the three availability lists in parallel.
+# Worker threads have no request context, so each task checks out exactly
+# one pooled connection (schedules and the position ledger are read on the
+# same cursor) on top of the request's one. At most one snapshot's three
+# loads run at a time, and never more than a fifth of the DB pool's
+# capacity, so snapshot tasks cannot starve requests of connections
+# (further snapshots queue here instead of in the DB pool).
+SNAPSHOT_WORKERS = max(1, min(3, (POOL_CONFIG["size"] + POOL_CONFIG["max_overflow"]) // 5))
+_executor = ThreadPoolExecutor(max_workers=SNAPSHOT_WORKERS, thread_name_prefix="availability")
+
+_versions = {"plane": 0, "crew": 0}
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def set_availability_engine(name):
+    """Select the availability engine ("python" / "sql") for this process."""
+    global _engine
+    if name not in AVAILABILITY_ENGINES:
+        raise ValueError(f"Unknown availability engine: {name}")
+    _engine = name
+
+
+def get_availability_engine():
+    return _engine
+
+
+def get_schedule_version(kind):
+    return _versions[kind]
+
+
+def bump_schedule_version(*kinds):
+    """Invalidate every snapshot of the given kinds ("plane" / "crew")."""
+    with _lock:
+        for kind in kinds:
+            _versions[kind] += 1
+
+
+def invalidate_on_commit(*kinds):
+    """Bump the schedule versions once the current transaction commits."""
+    call_on_commit(lambda: bump_schedule_version(*kinds))
+
+
+def _cached(key, version_kind, compute):
+    key = key + (_engine, _versions[version_kind], get_route_catalog_version())
+    now = time.monotonic()
+
+    with _lock:
+        entry = _cache.get(key)
+        if entry and now - entry[0] < SNAPSHOT_TTL_SECONDS:
+            _cache.move_to_end(key)
+            return entry[1]
+
+    value = compute()
+
+    with _lock:
+        _cache[key] = (now, value)
+        _cache.move_to_end(key)
+        while len(_cache) > SNAPSHOT_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return value
+
+
+def get_available_planes_cached(origin, destination, departure_datetime):
+    return _cached(
+        ("plane", origin, destination, departure_datetime), "plane",
+        lambda: AVAILABILITY_ENGINES[_engine][0](origin, destination, departure_datetime)
+    )
+
+
+def get_available_attendants_cached(flight_datetime, origin, destination, is_long_flight=None):
+    return _cached(
+        ("attendant", origin, destination, flight_datetime, is_long_flight), "crew",
+        lambda: AVAILABILITY_ENGINES[_engine][1](flight_datetime, origin, destination, is_long_flight)
+    )
+
+
+def get_available_pilots_cached(flight_datetime, origin, destination, is_long_flight=None):
+    return _cached(
+        ("pilot", origin, destination, flight_datetime, is_long_flight), "crew",
+        lambda: AVAILABILITY_ENGINES[_engine][2](flight_datetime, origin, destination, is_long_flight)
+    )
+
+
+def _timed(compute, *args):
+    start = time.perf_counter()
+    value = compute(*args)
+    return value, round(time.perf_counter() - start, 4)
+
+
+def get_availability_snapshot(origin, destination, departure_datetime, is_long_flight=None):
+    """
+    Planes, attendants and pilots available for the given slot, computed
+    concurrently (latency is the slowest of the three, not their sum).
+    The returned lists are shared between requests - do not modify them.
+
+    Returns {planes, attendants, pilots, timings}, timings in seconds per list.
+    Only committed data is seen (the tasks do not use the request's transaction).
+    """
+    # Load the route catalog here if needed, so no task opens a second
+    # connection for it while holding its own
+    get_route_catalog()
+
+    futures = {
+        "planes": _executor.submit(
+            _timed, get_available_planes_cached, origin, destination, departure_datetime),
+        "attendants": _executor.submit(
+            _timed, get_available_attendants_cached,
+            departure_datetime, origin, destination, is_long_flight),
+        "pilots": _executor.submit(
+            _timed, get_available_pilots_cached,
+            departure_datetime, origin, destination, is_long_flight)
+    }
+
+    snapshot = {"timings": {}}
+    for name, future in futures.items():
+        snapshot[name], snapshot["timings"][name] = future.result()
+    return snapshot
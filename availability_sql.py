@@ -0,0 +1,255 @@
+from utils import get_connection
+from route_catalog import get_route_catalog
+from resource_positions import OCCUPYING_FLIGHT_FILTER
+from func_for_flights import (
+    BASE_AIRPORT,
+    SCHEDULE_SOURCES,
+    compute_arrival,
+    get_available_attendants,
+    get_available_pilots
+)
+
+
+# ==============================
+# SQL availability engine (MySQL 8 window functions)
+# ==============================
+# Same rules and result shape as get_available_planes / _attendants / _pilots
+# in func_for_flights, but evaluated by the database in one statement per
+# resource type. For every candidate a "new flight" row is merged into its
+# timeline, and window functions over that timeline give:
+#   - the latest arrival of the flights departing before it   (overlap)
+#   - the next flight by departure                             (overlap + transfer after)
+#   - the previous flight by arrival, <= / < the new departure (transfer before / display)
+# Repositioning times come from the in-process route catalog (multi-hop
+# shortest paths), passed in as a small derived table.
+
+_AVAILABILITY_SQL = """
+    WITH transfer (airport, to_origin, from_destination) AS (
+        {transfer_rows}
+    ),
+    candidates AS (
+        {candidates}
+    ),
+    history AS (
+        SELECT {id_column} AS resource_id,
+               f.flight_id,
+               f.departure_datetime AS departure,
+               f.departure_datetime + INTERVAL ROUND(COALESCE(r.minutes, 0) * 60) SECOND AS arrival,
+               f.origin,
+               f.destination
+        FROM {source}
+        JOIN candidates c ON c.resource_id = {id_column}
+        LEFT JOIN Route r ON r.origin = f.origin AND r.destination = f.destination
+        WHERE {occupying_filter}
+    ),
+    timeline AS (
+        SELECT resource_id, flight_id, departure, arrival,
+               arrival AS arrival_key, origin, destination, 0 AS is_new
+        FROM history
+        UNION ALL
+        -- CAST keeps the timeline columns DATETIME (plain parameters
+        -- would turn the whole UNION into VARCHAR)
+        SELECT resource_id, 0, CAST(%(departure)s AS DATETIME), CAST(%(arrival)s AS DATETIME),
+               CAST(%(departure)s AS DATETIME), %(origin)s, %(destination)s, 1
+        FROM candidates
+    ),
+    windowed AS (
+        SELECT t.resource_id,
+               t.is_new,
+               MAX(t.arrival) OVER before_by_departure AS max_prev_arrival,
+               LEAD(t.departure) OVER by_departure AS next_departure,
+               LEAD(t.origin) OVER by_departure AS next_origin,
+               LAG(t.arrival) OVER by_arrival AS prev_arrival,
+               LAG(t.destination) OVER by_arrival AS prev_destination,
+               LAG(t.origin) OVER by_arrival_strict AS last_origin,
+               LAG(t.destination) OVER by_arrival_strict AS last_destination,
+               LAG(t.arrival) OVER by_arrival_strict AS last_arrival
+        FROM timeline t
+        WINDOW by_departure AS (PARTITION BY t.resource_id
+                                ORDER BY t.departure, t.is_new, t.flight_id),
+               before_by_departure AS (by_departure
+                                       ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING),
+               by_arrival AS (PARTITION BY t.resource_id
+                              ORDER BY t.arrival_key, t.is_new, t.flight_id),
+               by_arrival_strict AS (PARTITION BY t.resource_id
+                                     ORDER BY t.arrival_key, t.is_new DESC, t.flight_id)
+    )
+    SELECT {detail_columns},
+           w.last_origin,
+           w.last_destination,
+           w.last_arrival
+    FROM windowed w
+    {detail_join}
+    LEFT JOIN transfer tp ON tp.airport = w.prev_destination
+    LEFT JOIN transfer tn ON tn.airport = w.next_origin
+    WHERE w.is_new = 1
+      -- no overlap with earlier / later flights
+      AND (w.max_prev_arrival IS NULL OR w.max_prev_arrival <= %(departure)s)
+      AND (w.next_departure IS NULL OR w.next_departure >= %(arrival)s)
+      -- enough time to reach the origin, and to reach the next flight
+      AND (w.prev_arrival IS NULL
+           OR w.prev_arrival + INTERVAL ROUND(COALESCE(tp.to_origin, 0) * 60) SECOND <= %(departure)s)
+      AND (w.next_departure IS NULL
+           OR %(arrival)s + INTERVAL ROUND(COALESCE(tn.from_destination, 0) * 60) SECOND <= w.next_departure)
+    {order_by}
+"""
+
+
+def _transfer_rows(catalog, origin, destination, params):
+    """
+    Derived table rows: (airport, minutes to the new origin, minutes from the new destination).
+    Same airport -> 0, unreachable -> NULL (treated as an instant transfer, like the Python engine).
+    """
+    def whole_minutes(minutes):
+        return None if minutes is None else int(minutes)
+
+    rows = []
+    for i, airport in enumerate(catalog.airport_index):
+        params[f"airport_{i}"] = airport
+        params[f"to_origin_{i}"] = (
+            0 if airport == origin else whole_minutes(catalog.transfer_minutes(airport, origin)))
+        params[f"from_dest_{i}"] = (
+            0 if airport == destination else whole_minutes(catalog.transfer_minutes(destination, airport)))
+        rows.append(f"SELECT %(airport_{i})s, %(to_origin_{i})s, %(from_dest_{i})s")
+
+    if not rows:
+        return "SELECT NULL, NULL, NULL FROM DUAL WHERE FALSE"
+    return "\nUNION ALL\n".join(rows)
+
+
+def _query_available(resource_type, candidates, detail_columns, detail_join, order_by,
+                     origin, destination, departure_datetime):
+    catalog = get_route_catalog()
+
+    params = {
+        "departure": departure_datetime,
+        "arrival": compute_arrival(departure_datetime, origin, destination),
+        "origin": origin,
+        "destination": destination
+    }
+
+    id_column, source = SCHEDULE_SOURCES[resource_type]
+    sql = _AVAILABILITY_SQL.format(
+        transfer_rows=_transfer_rows(catalog, origin, destination, params),
+        candidates=candidates,
+        id_column=id_column,
+        source=source,
+        occupying_filter=OCCUPYING_FLIGHT_FILTER,
+        detail_columns=detail_columns,
+        detail_join=detail_join,
+        order_by=order_by
+    )
+
+    conn = get_connection("FLYTAU")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return rows
+
+
+# ==============================
+# Available planes
+# ==============================
+
+def get_available_planes_sql(origin, destination, departure_datetime):
+    """SQL engine version of func_for_flights.get_available_planes (same result shape)."""
+    minutes = get_route_catalog().minutes(origin, destination)
+    if minutes is None:
+        return []
+
+    is_long_flight = minutes > 360
+    size_condition = "size = 'large'" if is_long_flight else "size IN ('small', 'large')"
+
+    rows = _query_available(
+        "plane",
+        f"SELECT plane_id AS resource_id FROM Planes WHERE {size_condition}",
+        """p.plane_id,
+           p.producer,
+           p.size,
+           COALESCE(seats.total_seats, 0) AS total_seats""",
+        """JOIN Planes p ON p.plane_id = w.resource_id
+           LEFT JOIN (
+               SELECT plane_id, SUM(rows_number * columns_number) AS total_seats
+               FROM Plane_Class
+               GROUP BY plane_id
+           ) seats ON seats.plane_id = p.plane_id""",
+        "ORDER BY p.plane_id",
+        origin, destination, departure_datetime
+    )
+
+    return [{
+        "plane_id": r["plane_id"],
+        "producer": r["producer"],
+        "size": r["size"],
+        "total_seats": r["total_seats"],
+        "is_long_flight": is_long_flight,
+        "last_origin": r["last_origin"] or BASE_AIRPORT,
+        "last_destination": r["last_destination"],
+        "last_arrival": r["last_arrival"]
+    } for r in rows]
+
+
+# ==============================
+# Available crew
+# ==============================
+
+def _get_available_crew_sql(table, id_key, flight_datetime, origin, destination, is_long_flight):
+    minutes = get_route_catalog().minutes(origin, destination)
+    if minutes is None:
+        return []
+
+    if is_long_flight is None:
+        is_long_flight = minutes > 360
+
+    training_condition = "WHERE LOWER(training_type) IN ('long', 'both')" if is_long_flight else ""
+
+    return _query_available(
+        "attendant" if table == "FlightAttendants" else "pilot",
+        f"SELECT {id_key} AS resource_id FROM {table} {training_condition}",
+        f"""e.{id_key},
+           CONCAT(e.first_name, ' ', e.last_name) AS full_name,
+           e.training_type,
+           e.start_date""",
+        f"JOIN {table} e ON e.{id_key} = w.resource_id",
+        "ORDER BY e.first_name, e.last_name",
+        origin, destination, flight_datetime
+    )
+
+
+def get_available_attendants_sql(flight_datetime, origin=None, destination=None, is_long_flight=None):
+    """SQL engine version of func_for_flights.get_available_attendants (same result shape)."""
+    if origin is None or destination is None:
+        # No route to check against -> same fallback list as the Python engine
+        return get_available_attendants(flight_datetime)
+
+    rows = _get_available_crew_sql("FlightAttendants", "attendant_id",
+                                   flight_datetime, origin, destination, is_long_flight)
+    return [{
+        "attendant_id": r["attendant_id"],
+        "full_name": r["full_name"],
+        "training_type": r["training_type"],
+        "start_date": r["start_date"],
+        "last_arrival": r["last_arrival"],
+        "last_destination": r["last_destination"] or BASE_AIRPORT
+    } for r in rows]
+
+
+def get_available_pilots_sql(flight_datetime, origin=None, destination=None, is_long_flight=None):
+    """SQL engine version of func_for_flights.get_available_pilots (same result shape)."""
+    if origin is None or destination is None:
+        # No route to check against -> same fallback list as the Python engine
+        return get_available_pilots(flight_datetime)
+
+    rows = _get_available_crew_sql("Pilots", "pilot_id",
+                                   flight_datetime, origin, destination, is_long_flight)
+    return [{
+        "pilot_id": r["pilot_id"],
+        "full_name": r["full_name"],
+        "training_type": r["training_type"],
+        "start_date": r["start_date"],
+        "last_origin": r["last_origin"] or BASE_AIRPORT,
+        "last_destination": r["last_destination"] or BASE_AIRPORT,
+        "last_arrival": r["last_arrival"]
+    } for r in rows]
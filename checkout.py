@@ -0,0 +1,120 @@
+from mysql.connector import errorcode
+from mysql.connector.errors import IntegrityError
+
+from utils import get_connection
+from seat_inventory import add_sold_seats, lock_flights, SeatConflictError
+from seat_holds import release_token_holds
+from seat_occupancy import mark_sold
+
+
+# ==============================
+# Checkout
+# ==============================
+# The order and all of its seats are written in one transaction on one
+# connection. Checkouts of the same flight are serialized by locking the
+# flight's Flight_Inventory rows, so the "is this seat already sold?" check
+# and the insert cannot interleave with another buyer. A conflict is
+# reported once as SeatConflictError - the caller sends the customer back
+# to seat selection instead of retrying. The unique index on active
+# Booking_Seats rows (flight, seat) is the last line of defence.
+
+def checkout(order, hold_token=None):
+    """
+    Saves the order (Orders) and its seats (Booking_Seats) atomically.
+    order.seats: list of {plane_id, class_type, seat_number}.
+    hold_token: the customer's seat-hold token; their holds on the flight
+                are released in the same transaction, and only seats held
+                by other customers count as taken.
+
+    Sets and returns order.order_id.
+    Raises SeatConflictError if a seat was sold meanwhile or the flight
+    can no longer be booked; nothing is written in that case.
+    """
+    if not order.seats:
+        raise ValueError("Order has no seats")
+
+    seat_numbers = [s["seat_number"] for s in order.seats]
+    if len(set(seat_numbers)) != len(seat_numbers):
+        raise SeatConflictError(order.flight_id, set(seat_numbers), reason="duplicate_seats")
+
+    # Own connection: locks are released as soon as the checkout commits
+    conn = get_connection("FLYTAU", request_scoped=False)
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        # Serialize checkouts (and holds) of this flight
+        # (lock_flights is keyed by the DB's int id; order.flight_id may be a form string)
+        flight_id = int(order.flight_id)
+        status = lock_flights(cursor, [flight_id]).get(flight_id)
+        if status != "Scheduled":
+            raise SeatConflictError(order.flight_id, seat_numbers, reason="flight_not_bookable")
+
+        placeholders = ", ".join(["%s"] * len(seat_numbers))
+        # Index-only lookup on uq_booking_seats_active_seat
+        cursor.execute(f"""
+            SELECT seat_number
+            FROM Booking_Seats
+            WHERE active_flight_id = %s
+              AND seat_number IN ({placeholders})
+        """, [order.flight_id] + seat_numbers)
+        taken = {r["seat_number"] for r in cursor.fetchall()}
+        if taken:
+            raise SeatConflictError(order.flight_id, taken)
+
+        # Live holds of other customers
+        cursor.execute(f"""
+            SELECT seat_number
+            FROM Seat_Holds
+            WHERE flight_id = %s
+              AND seat_number IN ({placeholders})
+              AND expires_at >= NOW()
+              AND hold_token <> %s
+        """, [order.flight_id] + seat_numbers + [hold_token or ""])
+        held = {r["seat_number"] for r in cursor.fetchall()}
+        if held:
+            raise SeatConflictError(order.flight_id, held, reason="seats_held")
+
+        # The customer's own holds become sold seats
+        if hold_token:
+            release_token_holds(cursor, hold_token, order.flight_id)
+
+        cursor.execute("""
+            INSERT INTO Orders
+            (order_status, total_amount, guest_email, registered_email, flight_id, order_date)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (
+            order.order_status,
+            order.total_amount,
+            order.email_guest,
+            order.email_registered,
+            order.flight_id,
+            order.order_date
+        ))
+        order_id = cursor.lastrowid
+
+        cursor.execute(
+            "INSERT INTO Booking_Seats (order_id, plane_id, class_type, seat_number, flight_id, active) VALUES "
+            + ", ".join(["(%s, %s, %s, %s, %s, 1)"] * len(order.seats)),
+            [v for s in order.seats
+             for v in (order_id, s["plane_id"], s["class_type"], s["seat_number"], order.flight_id)]
+        )
+
+        add_sold_seats(cursor, order.flight_id, order.seats)
+
+        conn.commit()
+    except IntegrityError as e:
+        conn.rollback()
+        if e.errno == errorcode.ER_DUP_ENTRY:
+            raise SeatConflictError(order.flight_id, seat_numbers) from e
+        raise
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    mark_sold(order.flight_id, seat_numbers, hold_token)
+
+    order.order_id = order_id
+    return order_id
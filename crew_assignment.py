@@ -0,0 +1,143 @@
+from datetime import datetime
+
+from utils import get_connection
+from route_catalog import get_route_minutes, get_transfer_minutes
+from func_for_flights import BASE_AIRPORT
+from resource_positions import OCCUPYING_FLIGHT_FILTER
+from availability_cache import (
+    get_available_attendants_cached,
+    get_available_pilots_cached
+)
+
+
+# ==============================
+# Automatic crew assignment
+# ==============================
+# Candidates come from the availability functions, so every suggested crew
+# member is already feasible (no overlap, enough transfer time, long-flight
+# training). Among them we pick the cheapest according to:
+#   - repositioning time from their current airport to the new origin
+#   - idle gap between their last arrival and the new departure
+#   - accumulated flight hours above the least-loaded candidate (balancing)
+#   - using long-trained crew on a short flight (keep them for long flights)
+# The cost of each person is independent of the others, so taking the
+# lowest-cost candidates is optimal for the whole crew.
+
+REPOSITION_WEIGHT = 1.0       # per minute of repositioning
+IDLE_WEIGHT = 0.1             # per minute of idle gap (capped)
+IDLE_CAP_MINUTES = 48 * 60    # beyond this, idle time no longer matters
+HOURS_WEIGHT = 30.0           # per accumulated flight hour above the minimum
+LONG_TRAINED_PENALTY = 120.0  # long-trained crew on a short flight
+
+
+def get_accumulated_hours():
+    """
+    Flight hours of every pilot and attendant (every non-cancelled flight,
+    OCCUPYING_FLIGHT_FILTER), in one query. Returns {("pilot" | "attendant", id): hours}.
+    """
+    conn = get_connection("FLYTAU")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(f"""
+        SELECT 'pilot' AS crew_type, pf.pilot_id AS crew_id, SUM(r.minutes) AS total_m
+        FROM PilotsFlights pf
+        JOIN Flights f ON f.flight_id = pf.flight_id
+        JOIN Route r ON r.origin = f.origin AND r.destination = f.destination
+        WHERE {OCCUPYING_FLIGHT_FILTER}
+        GROUP BY pf.pilot_id
+
+        UNION ALL
+
+        SELECT 'attendant', faf.attendant_id, SUM(r.minutes)
+        FROM FlightAttendantsFlights faf
+        JOIN Flights f ON f.flight_id = faf.flight_id
+        JOIN Route r ON r.origin = f.origin AND r.destination = f.destination
+        WHERE {OCCUPYING_FLIGHT_FILTER}
+        GROUP BY faf.attendant_id
+    """)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    return {(r["crew_type"], r["crew_id"]): float(r["total_m"] or 0) / 60 for r in rows}
+
+
+def rank_crew_candidates(candidates, crew_type, id_key, origin, departure_datetime,
+                         is_long_flight, hours):
+    """Returns the candidates sorted by cost (cheapest first), each with its cost breakdown."""
+    candidate_hours = [hours.get((crew_type, c[id_key]), 0.0) for c in candidates]
+    min_hours = min(candidate_hours) if candidate_hours else 0.0
+
+    ranked = []
+    for c, crew_hours in zip(candidates, candidate_hours):
+        location = c.get("last_destination") or BASE_AIRPORT
+        if location == origin:
+            reposition = 0.0
+        else:
+            reposition = get_transfer_minutes(location, origin) or 0.0
+
+        if c.get("last_arrival"):
+            idle = (departure_datetime - c["last_arrival"]).total_seconds() / 60 - reposition
+            idle = min(max(idle, 0.0), IDLE_CAP_MINUTES)
+        else:
+            idle = IDLE_CAP_MINUTES  # never flown -> treat as fully idle
+
+        long_trained = (c.get("training_type") or "").lower() in ("long", "both")
+        training_penalty = LONG_TRAINED_PENALTY if long_trained and not is_long_flight else 0.0
+
+        cost = (REPOSITION_WEIGHT * reposition
+                + IDLE_WEIGHT * idle
+                + HOURS_WEIGHT * (crew_hours - min_hours)
+                + training_penalty)
+
+        ranked.append({
+            "id": c[id_key],
+            "full_name": c.get("full_name"),
+            "cost": round(cost, 2),
+            "reposition_minutes": round(reposition, 1),
+            "idle_minutes": round(idle, 1),
+            "accumulated_hours": round(crew_hours, 1)
+        })
+
+    ranked.sort(key=lambda r: (r["cost"], r["id"]))
+    return ranked
+
+
+def auto_assign_crew(origin, destination, departure_datetime,
+                     required_attendants, required_pilots, is_long_flight=None):
+    """
+    Picks a feasible crew for a new flight.
+
+    Returns:
+    {
+        attendant_ids, pilot_ids,   # chosen ids (may be short if not enough crew)
+        complete,                   # True if both counts were met
+        attendants, pilots          # chosen members with their cost breakdown
+    }
+    """
+    if isinstance(departure_datetime, str):
+        departure_datetime = datetime.fromisoformat(departure_datetime)
+
+    attendants = get_available_attendants_cached(departure_datetime, origin, destination, is_long_flight)
+    pilots = get_available_pilots_cached(departure_datetime, origin, destination, is_long_flight)
+
+    if is_long_flight is None:
+        minutes = get_route_minutes(origin, destination)
+        is_long_flight = bool(minutes and minutes > 360)
+
+    hours = get_accumulated_hours()
+
+    chosen_attendants = rank_crew_candidates(
+        attendants, "attendant", "attendant_id", origin, departure_datetime, is_long_flight, hours
+    )[:required_attendants]
+    chosen_pilots = rank_crew_candidates(
+        pilots, "pilot", "pilot_id", origin, departure_datetime, is_long_flight, hours
+    )[:required_pilots]
+
+    return {
+        "attendant_ids": [a["id"] for a in chosen_attendants],
+        "pilot_ids": [p["id"] for p in chosen_pilots],
+        "complete": (len(chosen_attendants) == required_attendants
+                     and len(chosen_pilots) == required_pilots),
+        "attendants": chosen_attendants,
+        "pilots": chosen_pilots
+    }
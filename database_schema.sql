@@ -99,8 +99,14 @@ CREATE TABLE Booking_Seats (
     plane_id INT,
     class_type VARCHAR(20),
     seat_number VARCHAR(10),
+    flight_id INT NOT NULL,
+    active TINYINT(1) NOT NULL DEFAULT 1,
+    -- flight_id of active rows, NULL once the order is cancelled
+    active_flight_id INT AS (IF(active = 1, flight_id, NULL)) STORED,
     PRIMARY KEY (order_id, plane_id, class_type, seat_number),
+    UNIQUE INDEX uq_booking_seats_active_seat (active_flight_id, seat_number),
     FOREIGN KEY (order_id) REFERENCES Orders(order_id),
+    CONSTRAINT fk_booking_seats_flight FOREIGN KEY (flight_id) REFERENCES Flights(flight_id),
     FOREIGN KEY (plane_id, class_type, seat_number)
         REFERENCES Seats(plane_id, class_type, seat_number));
 
@@ -170,6 +176,44 @@ CREATE TABLE PilotsFlights (
     FOREIGN KEY (flight_id) REFERENCES Flights(flight_id),
     FOREIGN KEY (pilot_id) REFERENCES Pilots(pilot_id));
 
+CREATE TABLE Flight_Inventory (
+    flight_id INT NOT NULL,
+    class_type VARCHAR(45) NOT NULL,
+    capacity INT NOT NULL,
+    sold INT NOT NULL DEFAULT 0,
+    held INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (flight_id, class_type),
+    FOREIGN KEY (flight_id) REFERENCES Flights(flight_id));
+
+CREATE TABLE Resource_Positions (
+    resource_type ENUM('plane','pilot','attendant') NOT NULL,
+    resource_id INT NOT NULL,
+    flight_id INT NOT NULL,
+    origin VARCHAR(50) NOT NULL,
+    location VARCHAR(50) NOT NULL,
+    free_from DATETIME NOT NULL,
+    PRIMARY KEY (resource_type, resource_id, flight_id),
+    INDEX idx_positions_free_from (resource_type, resource_id, free_from),
+    INDEX idx_positions_flight (flight_id),
+    FOREIGN KEY (flight_id) REFERENCES Flights(flight_id));
+
+CREATE TABLE Seat_Holds (
+    flight_id INT NOT NULL,
+    seat_number VARCHAR(10) NOT NULL,
+    class_type VARCHAR(20) NOT NULL,
+    hold_token CHAR(32) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (flight_id, seat_number),
+    INDEX idx_seat_holds_expires (expires_at),
+    INDEX idx_seat_holds_token (hold_token, flight_id),
+    FOREIGN KEY (flight_id) REFERENCES Flights(flight_id));
+
+CREATE TABLE Scheduler_Signals (
+    name VARCHAR(50) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0);
+
+INSERT INTO Scheduler_Signals (name, version) VALUES ('flights_changed', 0);
+
 
 -- =========================
 -- Managers
@@ -501,14 +545,14 @@ INSERT INTO Orders (order_status, total_amount, flight_id, order_date, guest_ema
 -- =========================
 -- Booking Seats
 -- =========================
-INSERT INTO Booking_Seats (order_id, plane_id, class_type, seat_number) VALUES
-(1, 2001, 'Economy', '1A'),
-(1, 2001, 'Economy', '1B'),
-(2, 1001, 'Economy', '10A'),
-(3, 1002, 'Business', '1C'),
-(4, 1002, 'Economy', '10D'),
-(5, 2001, 'Economy', '5A'),
-(6, 2002, 'Economy', '5C');
+INSERT INTO Booking_Seats (order_id, plane_id, class_type, seat_number, flight_id, active) VALUES
+(1, 2001, 'Economy', '1A', 1, 1),
+(1, 2001, 'Economy', '1B', 1, 1),
+(2, 1001, 'Economy', '10A', 5, 1),
+(3, 1002, 'Business', '1C', 4, 0),
+(4, 1002, 'Economy', '10D', 6, 1),
+(5, 2001, 'Economy', '5A', 1, 1),
+(6, 2002, 'Economy', '5C', 2, 0);
 
 -- =========================
 -- Assign Flight Attendants to Flights
@@ -770,3 +814,27 @@ INSERT INTO PilotsFlights (flight_id, pilot_id) VALUES
 (38,4006),
 (38,4007);
 
+
+-- =========================
+-- Flight Inventory (built from the data above)
+-- =========================
+INSERT INTO Flight_Inventory (flight_id, class_type, capacity, sold, held)
+SELECT f.flight_id,
+       pc.class_type,
+       pc.rows_number * pc.columns_number,
+       COALESCE(b.sold, 0),
+       0
+FROM Flights f
+JOIN Plane_Class pc ON pc.plane_id = f.plane_id
+LEFT JOIN (
+    SELECT flight_id, class_type, COUNT(*) AS sold
+    FROM Booking_Seats
+    WHERE active = 1
+    GROUP BY flight_id, class_type
+) b ON b.flight_id = f.flight_id AND b.class_type = pc.class_type;
+
+
+-- =========================
+-- Resource Positions: filled from the data above by `python migrate.py`
+-- (migrations/004_resource_positions.sql holds the backfill)
+-- =========================
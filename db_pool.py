@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+
+class PooledConnection:
+    """
+    Thin wrapper around a raw MySQL connection that belongs to a pool.
+    Everything is delegated to the raw connection, except close(),
+    which returns the connection to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool, raw_conn, created_at):
+        self._pool = pool
+        self._raw = raw_conn
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self._raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Safety net for code paths that forget to call close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Fixed-size MySQL connection pool with overflow.
+
+    - size:         connections kept open while idle
+    - max_overflow: extra connections allowed under peak load (closed on release)
+    - timeout:      seconds to wait for a free connection before raising PoolError
+    - recycle:      seconds after which a connection is replaced on checkout
+    - pre_ping:     check that an idle connection is still alive before handing it out
+    """
+
+    def __init__(self, connect_args, size=5, max_overflow=10, timeout=10,
+                 recycle=3600, pre_ping=True):
+        self.connect_args = dict(connect_args)
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = deque()  # (raw_conn, created_at)
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        # --- Stats ---
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    # -----------------------------
+    # Internal helpers
+    # -----------------------------
+    def _connect(self):
+        return mysql.connector.connect(**self.connect_args), time.monotonic()
+
+    @staticmethod
+    def _discard(raw_conn):
+        try:
+            raw_conn.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, raw_conn, created_at):
+        if self.recycle is not None and time.monotonic() - created_at > self.recycle:
+            return False
+        if self.pre_ping:
+            try:
+                raw_conn.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    # -----------------------------
+    # Checkout / release
+    # -----------------------------
+    def get_connection(self):
+        """
+        Check out a connection. Blocks up to `timeout` seconds
+        when size + max_overflow connections are already in use.
+        """
+        start = time.monotonic()
+        with self._cond:
+            while self._in_use >= self.size + self.max_overflow:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolError("Timed out waiting for a database connection")
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            candidate = self._idle.popleft() if self._idle else None
+
+            waited = time.monotonic() - start
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        # Network work (ping / connect) happens outside the lock
+        try:
+            if candidate and self._is_usable(*candidate):
+                raw_conn, created_at = candidate
+            else:
+                if candidate:
+                    self._discard(candidate[0])
+                raw_conn, created_at = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, raw_conn, created_at)
+
+    def _release(self, raw_conn, created_at):
+        # Never hand uncommitted work to the next borrower
+        keep = True
+        try:
+            if raw_conn.is_connected():
+                raw_conn.rollback()
+            else:
+                keep = False
+        except Exception:
+            keep = False
+
+        with self._cond:
+            self._in_use -= 1
+            if keep and len(self._idle) < self.size:
+                self._idle.append((raw_conn, created_at))
+                raw_conn = None
+            self._cond.notify()
+
+        if raw_conn is not None:
+            self._discard(raw_conn)
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones are closed on release)."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for raw_conn, _ in idle:
+            self._discard(raw_conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "total_wait_seconds": round(self._total_wait, 6),
+                "avg_wait_seconds": round(self._total_wait / self._checkouts, 6) if self._checkouts else 0.0,
+                "max_wait_seconds": round(self._max_wait, 6),
+            }
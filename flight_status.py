@@ -0,0 +1,279 @@
+import heapq
+import threading
+import time
+from datetime import datetime
+
+from utils import get_connection
+
+STATUS_LOCK_NAME = "flytau_flight_status"
+CHANGE_SIGNAL_NAME = "flights_changed"   # row in Scheduler_Signals
+
+
+# ==============================
+# Flight status transitions
+# ==============================
+
+# Seats per flight, from the inventory counters
+_FLIGHT_SEATS = """
+    SELECT flight_id, SUM(capacity) AS total_seats, SUM(sold) AS booked_count
+    FROM Flight_Inventory
+    GROUP BY flight_id
+"""
+
+
+def update_flight_status(cursor=None):
+    """
+    Advances flight statuses with one UPDATE per transition:
+    - Scheduled / Fully_Booked -> Occurred      (departure time has passed)
+    - Scheduled -> Fully_Booked                 (booked seats >= plane capacity)
+    - Fully_Booked -> Scheduled                 (cancellations freed seats)
+
+    Returns a dict with the number of rows each transition touched.
+    """
+    own_conn = cursor is None
+    if own_conn:
+        conn = get_connection("FLYTAU")
+        cursor = conn.cursor()
+
+    try:
+        # 1) Departed flights
+        cursor.execute("""
+            UPDATE Flights
+            SET flight_status = 'Occurred'
+            WHERE flight_status IN ('Scheduled', 'Fully_Booked')
+              AND departure_datetime < NOW()
+        """)
+        occurred = cursor.rowcount
+
+        # 2) Future flights with no seats left
+        cursor.execute(f"""
+            UPDATE Flights f
+            JOIN ({_FLIGHT_SEATS}) inv ON inv.flight_id = f.flight_id
+            SET f.flight_status = 'Fully_Booked'
+            WHERE f.flight_status = 'Scheduled'
+              AND f.departure_datetime >= NOW()
+              AND inv.booked_count >= inv.total_seats
+        """)
+        fully_booked = cursor.rowcount
+
+        # 3) Full flights that have seats again
+        cursor.execute(f"""
+            UPDATE Flights f
+            JOIN ({_FLIGHT_SEATS}) inv ON inv.flight_id = f.flight_id
+            SET f.flight_status = 'Scheduled'
+            WHERE f.flight_status = 'Fully_Booked'
+              AND f.departure_datetime >= NOW()
+              AND inv.booked_count < inv.total_seats
+        """)
+        reopened = cursor.rowcount
+
+        if own_conn:
+            conn.commit()
+    except Exception:
+        if own_conn:
+            conn.rollback()
+        raise
+    finally:
+        if own_conn:
+            cursor.close()
+            conn.close()
+
+    return {
+        "occurred": occurred,
+        "fully_booked": fully_booked,
+        "reopened": reopened
+    }
+
+
+# ==============================
+# Background scheduler
+# ==============================
+
+class FlightStatusScheduler(threading.Thread):
+    """
+    Background thread that advances flight statuses.
+
+    Only one process runs it at a time: the thread holds a MySQL GET_LOCK
+    on its own connection, and other workers retry until the lock is free.
+
+    The leader keeps a min-heap of upcoming departure times and sleeps
+    until the next departure boundary. A change (new flights, bookings,
+    cancellations) forces an immediate run and a reload of the heap:
+    wake() for changes made in this process, and every signal_poll_interval
+    seconds the leader reads the Scheduler_Signals version bumped by
+    notify_flights_changed() in any worker (one primary-key lookup).
+    refresh_interval is a safety net for changes made outside the app.
+    """
+
+    def __init__(self, refresh_interval=600, lock_retry_interval=30, horizon=1000,
+                 signal_poll_interval=5):
+        super().__init__(name="flight-status-scheduler", daemon=True)
+        self.refresh_interval = refresh_interval
+        self.lock_retry_interval = lock_retry_interval
+        self.horizon = horizon  # max departures kept in the heap
+        self.signal_poll_interval = signal_poll_interval
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+        self.is_leader = False
+        self.last_result = None
+        self.last_run = None
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    # -----------------------------
+    # Lock handling
+    # -----------------------------
+    @staticmethod
+    def _acquire_lock(cursor):
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (STATUS_LOCK_NAME,))
+        return cursor.fetchone()[0] == 1
+
+    @staticmethod
+    def _release_lock(cursor):
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (STATUS_LOCK_NAME,))
+        cursor.fetchone()
+
+    # -----------------------------
+    # Main loop
+    # -----------------------------
+    def run(self):
+        while not self._stopping.is_set():
+            conn = None
+            cursor = None
+            try:
+                conn = get_connection("FLYTAU", request_scoped=False)
+                cursor = conn.cursor()
+                if self._acquire_lock(cursor):
+                    self.is_leader = True
+                    self._lead(conn, cursor)
+            except Exception as e:
+                print("Flight status scheduler error:", e)
+            finally:
+                self.is_leader = False
+                if cursor is not None:
+                    try:
+                        self._release_lock(cursor)
+                        cursor.close()
+                    except Exception:
+                        pass
+                if conn is not None:
+                    conn.close()
+
+            self._stopping.wait(self.lock_retry_interval)
+
+    def _load_departures(self, cursor):
+        cursor.execute("""
+            SELECT departure_datetime
+            FROM Flights
+            WHERE flight_status IN ('Scheduled', 'Fully_Booked')
+              AND departure_datetime >= NOW()
+            ORDER BY departure_datetime
+            LIMIT %s
+        """, (self.horizon,))
+        heap = [row[0] for row in cursor.fetchall()]
+        heapq.heapify(heap)
+        return heap
+
+    @staticmethod
+    def _read_signal(conn, cursor):
+        cursor.execute("SELECT version FROM Scheduler_Signals WHERE name = %s", (CHANGE_SIGNAL_NAME,))
+        row = cursor.fetchone()
+        # End the read so the next poll sees newer commits
+        conn.commit()
+        return row[0] if row else None
+
+    def _run_transitions(self, conn, cursor):
+        self.last_result = update_flight_status(cursor)
+        self.last_run = datetime.now()
+        conn.commit()
+
+    def _lead(self, conn, cursor):
+        # Catch up on anything that happened while no one held the lock
+        signal = self._read_signal(conn, cursor)
+        self._run_transitions(conn, cursor)
+        heap = self._load_departures(cursor)
+        loaded_at = time.monotonic()
+
+        while not self._stopping.is_set():
+            timeout = min(self.refresh_interval - (time.monotonic() - loaded_at),
+                          self.signal_poll_interval)
+            if heap:
+                # +1s so the departure is strictly in the past for NOW()
+                until_departure = (heap[0] - datetime.now()).total_seconds() + 1
+                timeout = min(timeout, until_departure)
+
+            woken = self._wake.wait(max(timeout, 0))
+            self._wake.clear()
+            if self._stopping.is_set():
+                return
+
+            # Raises if the connection (and with it the lock) was lost
+            conn.ping(reconnect=False)
+
+            # Changes committed by any worker since the last run
+            current = self._read_signal(conn, cursor)
+            changed = woken or current != signal
+            signal = current
+
+            now = datetime.now()
+            departed = bool(heap) and heap[0] < now
+            stale = not heap or time.monotonic() - loaded_at >= self.refresh_interval
+            if not (changed or departed or stale):
+                continue
+
+            self._run_transitions(conn, cursor)
+
+            while heap and heap[0] < now:
+                heapq.heappop(heap)
+
+            if changed or stale or not heap:
+                heap = self._load_departures(cursor)
+                loaded_at = time.monotonic()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_flight_status_scheduler(**kwargs):
+    """Start the background scheduler for this process (once)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = FlightStatusScheduler(**kwargs)
+            _scheduler.start()
+    return _scheduler
+
+
+def notify_flights_changed():
+    """
+    Tell the scheduler that flights or bookings changed.
+    Called after the change is committed so the scheduler sees it.
+    Wakes the scheduler of this process and bumps the DB signal, so the
+    leader picks the change up even if it runs in another worker.
+    """
+    if _scheduler is not None:
+        _scheduler.wake()
+
+    try:
+        conn = get_connection("FLYTAU", request_scoped=False)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "UPDATE Scheduler_Signals SET version = version + 1 WHERE name = %s",
+                (CHANGE_SIGNAL_NAME,)
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception as e:
+        # The change itself is committed; the leader's refresh catches up
+        print("Flight status signal error:", e)
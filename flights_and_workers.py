@@ -1,5 +1,11 @@
 from datetime import datetime, timedelta
 from utils import get_connection
+from seat_inventory import init_flight_inventory
+from resource_positions import add_positions, remove_flight_positions, OCCUPYING_FLIGHT_FILTER
+from route_catalog import get_route_minutes
+from availability_cache import invalidate_on_commit
+from resource_schedule import ResourceSchedule
+from func_for_flights import can_insert_flight_for_resource
 
 class Flight:
         def __init__(
@@ -35,23 +41,12 @@ class Flight:
             Returns flight duration in hours based on origin and destination.
             """
 
-            conn = get_connection("FLYTAU")
-            cursor = conn.cursor(dictionary=True)
-
-            cursor.execute("""
-                SELECT minutes
-                FROM Route
-                WHERE origin = %s AND destination = %s
-            """, (self.origin, self.destination))
-
-            row = cursor.fetchone()
-            cursor.close()
-            conn.close()
+            minutes = get_route_minutes(self.origin, self.destination)
 
-            if not row:
+            if minutes is None:
                 raise ValueError("Flight duration not found")
 
-            return row["minutes"] / 60
+            return minutes / 60
 
         def get_arrival_datetime(self):
             """
@@ -96,49 +91,164 @@ class Flight:
                 self.plane_id
             ))
 
-            conn.commit()
-
             # Get auto-generated flight_id
             self.flight_id = cursor.lastrowid
 
-            cursor.close()
-            conn.close()
+            # Seat counters for the new flight, from the plane's classes
+            init_flight_inventory(cursor, self.flight_id, self.plane_id)
 
-        def assign_attendants(self, attendant_ids):
-            """
-            Assigns attendants to the flight.
-            """
-
-            conn = get_connection("FLYTAU")
-            cursor = conn.cursor()
-
-            for attendant_id in attendant_ids:
-                cursor.execute("""
-                    INSERT INTO FlightAttendantsFlights (flight_id, attendant_id)
-                    VALUES (%s, %s)
-                """, (self.flight_id, attendant_id))
+            # The plane will be at the destination once the flight lands
+            add_positions(cursor, [(
+                "plane", self.plane_id, self.flight_id,
+                self.origin, self.destination, self.get_arrival_datetime()
+            )])
 
             conn.commit()
             cursor.close()
             conn.close()
 
-        def assign_pilots(self, pilot_ids):
+            # The plane is now busy in this slot
+            invalidate_on_commit("plane")
+
+        def assign_crew(self, attendant_ids, pilot_ids):
             """
-            Assigns pilots to the flight.
+            Re-validates and assigns the whole crew in one short transaction.
+
+            - The flight and the selected crew rows are locked (SELECT ... FOR UPDATE),
+              so two managers cannot book the same person concurrently.
+            - All selected crew are re-checked against their schedules
+              (overlap, transfer time, long-flight training) with one query.
+            - Assignments are written with one multi-row insert per table.
+
+            Returns a list of conflict messages; empty list = crew assigned.
             """
+            if len(set(attendant_ids)) != len(attendant_ids) or len(set(pilot_ids)) != len(pilot_ids):
+                return ["The same crew member was selected twice"]
 
-            conn = get_connection("FLYTAU")
-            cursor = conn.cursor()
+            attendant_ids = sorted(attendant_ids)
+            pilot_ids = sorted(pilot_ids)
+            arrival = self.get_arrival_datetime()
+            is_long_flight = self.get_duration_hours() > 6
 
-            for pilot_id in pilot_ids:
-                cursor.execute("""
-                    INSERT INTO PilotsFlights (flight_id, pilot_id)
-                    VALUES (%s, %s)
-                """, (self.flight_id, pilot_id))
+            # Independent connection: the locks are released as soon as we commit,
+            # not at the end of the request
+            conn = get_connection("FLYTAU", request_scoped=False)
+            cursor = conn.cursor(dictionary=True)
 
-            conn.commit()
-            cursor.close()
-            conn.close()
+            try:
+                cursor.execute("""
+                    SELECT flight_status
+                    FROM Flights
+                    WHERE flight_id = %s
+                    FOR UPDATE
+                """, (self.flight_id,))
+                row = cursor.fetchone()
+                if not row or row["flight_status"] == "Cancelled":
+                    return ["Flight no longer exists or was cancelled"]
+
+                # Lock in a fixed order (by id) to avoid deadlocks
+                crew = {}
+                for crew_type, table, id_column, ids in (
+                    ("attendant", "FlightAttendants", "attendant_id", attendant_ids),
+                    ("pilot", "Pilots", "pilot_id", pilot_ids)
+                ):
+                    if not ids:
+                        continue
+                    cursor.execute(f"""
+                        SELECT {id_column} AS crew_id, training_type
+                        FROM {table}
+                        WHERE {id_column} IN ({", ".join(["%s"] * len(ids))})
+                        ORDER BY {id_column}
+                        FOR UPDATE
+                    """, ids)
+                    for r in cursor.fetchall():
+                        crew[(crew_type, r["crew_id"])] = r["training_type"]
+
+                conflicts = []
+                for crew_type, ids in (("attendant", attendant_ids), ("pilot", pilot_ids)):
+                    for crew_id in ids:
+                        if (crew_type, crew_id) not in crew:
+                            conflicts.append(f"{crew_type} {crew_id} does not exist")
+                            continue
+                        training_type = (crew[(crew_type, crew_id)] or "").lower()
+                        if is_long_flight and training_type not in ("long", "both"):
+                            conflicts.append(f"{crew_type} {crew_id} is not trained for long flights")
+
+                # Current schedules of all selected crew, read after the locks
+                # were granted, so assignments committed meanwhile are included
+                crew_filter = []
+                params = []
+                if attendant_ids:
+                    crew_filter.append(
+                        f"SELECT 'attendant' AS crew_type, attendant_id AS crew_id, flight_id "
+                        f"FROM FlightAttendantsFlights "
+                        f"WHERE attendant_id IN ({', '.join(['%s'] * len(attendant_ids))})"
+                    )
+                    params.extend(attendant_ids)
+                if pilot_ids:
+                    crew_filter.append(
+                        f"SELECT 'pilot', pilot_id, flight_id "
+                        f"FROM PilotsFlights "
+                        f"WHERE pilot_id IN ({', '.join(['%s'] * len(pilot_ids))})"
+                    )
+                    params.extend(pilot_ids)
+
+                schedules = {}
+                if crew_filter:
+                    cursor.execute(f"""
+                        SELECT c.crew_type, c.crew_id, f.flight_id, f.origin, f.destination,
+                               f.departure_datetime AS departure,
+                               f.departure_datetime + INTERVAL ROUND(COALESCE(r.minutes, 0) * 60) SECOND AS arrival
+                        FROM ({" UNION ALL ".join(crew_filter)}) c
+                        JOIN Flights f ON f.flight_id = c.flight_id
+                        LEFT JOIN Route r ON r.origin = f.origin AND r.destination = f.destination
+                        WHERE {OCCUPYING_FLIGHT_FILTER}
+                          AND f.flight_id <> %s
+                    """, params + [self.flight_id])
+                    for r in cursor.fetchall():
+                        schedules.setdefault((r["crew_type"], r["crew_id"]), []).append(r)
+
+                for key, flights in schedules.items():
+                    if key not in crew:
+                        continue
+                    schedule = ResourceSchedule(flights)
+                    if not can_insert_flight_for_resource(
+                        schedule, self.departure_datetime, self.origin, self.destination
+                    ):
+                        conflicts.append(f"{key[0]} {key[1]} is no longer available")
+
+                if conflicts:
+                    conn.rollback()
+                    return conflicts
+
+                if attendant_ids:
+                    cursor.execute(
+                        "INSERT INTO FlightAttendantsFlights (flight_id, attendant_id) VALUES "
+                        + ", ".join(["(%s, %s)"] * len(attendant_ids)),
+                        [v for a in attendant_ids for v in (self.flight_id, a)]
+                    )
+                if pilot_ids:
+                    cursor.execute(
+                        "INSERT INTO PilotsFlights (flight_id, pilot_id) VALUES "
+                        + ", ".join(["(%s, %s)"] * len(pilot_ids)),
+                        [v for p in pilot_ids for v in (self.flight_id, p)]
+                    )
+
+                add_positions(cursor, [
+                    ("attendant", a, self.flight_id, self.origin, self.destination, arrival)
+                    for a in attendant_ids
+                ] + [
+                    ("pilot", p, self.flight_id, self.origin, self.destination, arrival)
+                    for p in pilot_ids
+                ])
+
+                conn.commit()
+            finally:
+                cursor.close()
+                conn.close()
+
+            invalidate_on_commit("crew")
+            return []
 
         @staticmethod
         def get_by_id(flight_id):
@@ -165,6 +275,7 @@ class Flight:
 
             cursor.execute("DELETE FROM PilotsFlights WHERE flight_id = %s", (flight_id,))
             cursor.execute("DELETE FROM FlightAttendantsFlights WHERE flight_id = %s", (flight_id,))
+            remove_flight_positions(cursor, flight_id)
 
             cursor.execute("""
                 UPDATE Flights
@@ -176,6 +287,9 @@ class Flight:
             cursor.close()
             conn.close()
 
+            # Plane and crew are free again
+            invalidate_on_commit("plane", "crew")
+
         @staticmethod
         def get_all():
             conn = get_connection("FLYTAU")
@@ -193,6 +307,74 @@ class Flight:
 
             return rows
 
+        @staticmethod
+        def list_cancellable(after=None, limit=50, origin=None, destination=None):
+            """
+            Keyset-paginated list of flights that can still be cancelled
+            (Scheduled / Fully_Booked, departing at least 72 hours from now).
+
+            after: cursor (departure_datetime, flight_id) of the last row seen.
+            Returns (rows, next_cursor); next_cursor is None on the last page.
+            """
+            query = """
+                SELECT flight_id, departure_datetime, origin, destination, flight_status
+                FROM Flights
+                WHERE flight_status IN ('Scheduled', 'Fully_Booked')
+                  AND departure_datetime >= NOW() + INTERVAL 72 HOUR
+            """
+            params = []
+
+            if origin:
+                query += " AND origin = %s"
+                params.append(origin)
+
+            if destination:
+                query += " AND destination = %s"
+                params.append(destination)
+
+            if after:
+                last_departure, last_id = after
+                query += """
+                  AND (departure_datetime > %s
+                       OR (departure_datetime = %s AND flight_id > %s))
+                """
+                params += [last_departure, last_departure, last_id]
+
+            # Fetch one extra row to know whether there is a next page
+            query += " ORDER BY departure_datetime, flight_id LIMIT %s"
+            params.append(limit + 1)
+
+            conn = get_connection("FLYTAU")
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            cursor.close()
+            conn.close()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = (rows[-1]["departure_datetime"], rows[-1]["flight_id"])
+
+            return rows, next_cursor
+
+        @staticmethod
+        def encode_cursor(cursor_value):
+            """(departure_datetime, flight_id) -> URL-safe string."""
+            if not cursor_value:
+                return None
+            departure, flight_id = cursor_value
+            return f"{departure.strftime('%Y%m%d%H%M%S')}-{flight_id}"
+
+        @staticmethod
+        def decode_cursor(token):
+            """Inverse of encode_cursor. Returns None for a missing/invalid token."""
+            try:
+                departure, flight_id = token.split("-")
+                return datetime.strptime(departure, "%Y%m%d%H%M%S"), int(flight_id)
+            except (AttributeError, ValueError):
+                return None
+
         @staticmethod
         def can_cancel(flight_datetime):
             now = datetime.now()
@@ -1,5 +1,9 @@
+from collections import defaultdict
 from datetime import timedelta
 from utils import get_connection
+from resource_schedule import ResourceSchedule
+from resource_positions import get_positions_at, OCCUPYING_FLIGHT_FILTER
+from route_catalog import get_route_minutes, get_transfer_minutes
 
 BASE_AIRPORT = "Ben-Gurion"  # default base airport
 
@@ -8,139 +12,116 @@ BASE_AIRPORT = "Ben-Gurion"  # default base airport
 # Helper functions
 # ==============================
 
-def _get_flight_duration_minutes(cursor, origin, destination):
+def _get_flight_duration_minutes(origin, destination):
     """
-    Returns the flight duration in minutes from the 'route' table.
-    If no row exists for (origin, destination) -> returns None.
+    Returns the flight duration in minutes from the Route catalog.
+    If no route exists for (origin, destination) -> returns None.
     """
-    cursor.execute("""
-        SELECT minutes
-        FROM Route
-        WHERE origin = %s AND destination = %s
-    """, (origin, destination))
-    row = cursor.fetchone()
-    return row["minutes"] if row else None
+    return get_route_minutes(origin, destination)
 
 
-def _compute_arrival(cursor, departure_dt, origin, destination):
+def compute_arrival(departure_dt, origin, destination):
     """
-    Computes arrival datetime as departure + duration (from 'route' table).
+    Computes arrival datetime as departure + duration (from the Route catalog).
     If no route exists -> returns the original departure datetime (no change).
     """
-    minutes = _get_flight_duration_minutes(cursor, origin, destination)
+    minutes = _get_flight_duration_minutes(origin, destination)
     if minutes is None:
         return departure_dt
     return departure_dt + timedelta(minutes=minutes)
 
 
-def _travel_time_between(cursor, origin, destination):
+def _travel_time_between(origin, destination):
     """
     Returns a timedelta representing travel time between two airports
     (used for moving a resource between flights).
 
+    Uses the precomputed repositioning matrix, so a resource with no direct
+    route gets the shortest multi-hop time.
     If origin == destination -> returns timedelta(0).
-    If no route exists -> returns None.
+    If the airports are not connected at all -> returns None.
     """
     if origin == destination:
         return timedelta(0)
 
-    minutes = _get_flight_duration_minutes(cursor, origin, destination)
+    minutes = get_transfer_minutes(origin, destination)
     if minutes is None:
         return None
 
     return timedelta(minutes=minutes)
 
 
-def _get_resource_flights(cursor, plane_id=None, pilot_id=None, attendant_id=None):
-    """
-    Returns a list of flights for a given resource (plane / pilot / attendant),
-    each item containing: flight_id, departure, arrival, origin, destination.
-    Arrival is computed using _compute_arrival.
+# One query per resource type: (resource id column, FROM/JOIN clause)
+SCHEDULE_SOURCES = {
+    "plane": ("f.plane_id", "Flights f"),
+    "pilot": ("pf.pilot_id", "Flights f JOIN PilotsFlights pf ON pf.flight_id = f.flight_id"),
+    "attendant": ("faf.attendant_id",
+                  "Flights f JOIN FlightAttendantsFlights faf ON faf.flight_id = f.flight_id"),
+}
+
+
+def get_resource_schedules(cursor, resource_type):
     """
-    if plane_id is not None:
-        cursor.execute("""
-            SELECT f.flight_id,
-                   f.departure_datetime,
-                   f.origin,
-                   f.destination
-            FROM Flights f
-            WHERE f.plane_id = %s
-              AND f.flight_status IN ('Scheduled','Occurred')
-            ORDER BY f.departure_datetime
-        """, (plane_id,))
-    elif pilot_id is not None:
-        cursor.execute("""
-            SELECT f.flight_id,
-                   f.departure_datetime,
-                   f.origin,
-                   f.destination
-            FROM Flights f
-            JOIN PilotsFlights pf ON pf.flight_id = f.flight_id
-            WHERE pf.pilot_id = %s
-              AND f.flight_status IN ('Scheduled','Occurred')
-            ORDER BY f.departure_datetime
-        """, (pilot_id,))
-    elif attendant_id is not None:
-        cursor.execute("""
-            SELECT f.flight_id,
-                   f.departure_datetime,
-                   f.origin,
-                   f.destination
-            FROM Flights f
-            JOIN FlightAttendantsFlights faf ON faf.flight_id = f.flight_id
-            WHERE faf.attendant_id = %s
-              AND f.flight_status IN ('Scheduled','Occurred')
-            ORDER BY f.departure_datetime
-        """, (attendant_id,))
-    else:
-        return []
+    Loads the flights of every resource of one type (plane / pilot / attendant)
+    in a single query and groups them in memory.
 
-    rows = cursor.fetchall()
+    Returns {resource_id: ResourceSchedule}, each flight containing:
+    flight_id, departure, arrival, origin, destination.
+    Arrival is computed using compute_arrival (Route catalog, no DB access).
+    """
+    id_column, source = SCHEDULE_SOURCES[resource_type]
+    cursor.execute(f"""
+        SELECT {id_column} AS resource_id,
+               f.flight_id,
+               f.departure_datetime,
+               f.origin,
+               f.destination
+        FROM {source}
+        WHERE {OCCUPYING_FLIGHT_FILTER}
+        ORDER BY resource_id, f.departure_datetime
+    """)
 
-    flights = []
-    for r in rows:
-        arrival = _compute_arrival(cursor, r["departure_datetime"], r["origin"], r["destination"])
-        flights.append({
+    flights_by_resource = defaultdict(list)
+    for r in cursor.fetchall():
+        flights_by_resource[r["resource_id"]].append({
             "flight_id": r["flight_id"],
             "departure": r["departure_datetime"],
-            "arrival": arrival,
+            "arrival": compute_arrival(r["departure_datetime"], r["origin"], r["destination"]),
             "origin": r["origin"],
             "destination": r["destination"]
         })
-    return flights
+
+    return {rid: ResourceSchedule(flights) for rid, flights in flights_by_resource.items()}
 
 
-def _can_insert_flight_for_resource(cursor, existing_flights, new_dep, new_origin, new_dest):
+def can_insert_flight_for_resource(schedule, new_dep, new_origin, new_dest):
     """
     Validates if a resource (plane / pilot / attendant) can be assigned to a new flight.
+    schedule is the resource's ResourceSchedule; every lookup is O(log n).
 
     Conditions:
     - No time overlap between existing flights and the new flight
     - Enough travel time between previous flight -> new flight
     - Enough travel time between new flight -> next flight
     - If no previous flights: resource starts at BASE_AIRPORT
-    - If there is no route between locations: treat as instant transfer (0 minutes)
+    - Transfer time is the shortest (possibly multi-hop) path in the route graph
+    - If the locations are not connected at all: treat as instant transfer (0 minutes)
     """
 
-    new_arr = _compute_arrival(cursor, new_dep, new_origin, new_dest)
+    new_arr = compute_arrival(new_dep, new_origin, new_dest)
 
     # 1) Check simple time overlap
-    for fl in existing_flights:
-        if fl["departure"] < new_arr and fl["arrival"] > new_dep:
-            # Overlapping flights in time
-            return False
+    if schedule.overlaps(new_dep, new_arr):
+        return False
 
     # 2) Find closest flight before and after the new flight
-    before = [fl for fl in existing_flights if fl["arrival"] <= new_dep]
-    after = [fl for fl in existing_flights if fl["departure"] >= new_arr]
-
-    last_before = max(before, key=lambda x: x["arrival"]) if before else None
-    first_after = min(after, key=lambda x: x["departure"]) if after else None
+    last_before = schedule.last_before(new_dep)
+    first_after = schedule.first_after(new_arr)
 
     # 2A) Check transfer from previous flight -> new flight
     if last_before:
         prev_loc = last_before["destination"]
-        travel_time = _travel_time_between(cursor, prev_loc, new_origin)
+        travel_time = _travel_time_between(prev_loc, new_origin)
 
         # No route -> assume instant transfer
         if travel_time is None:
@@ -149,18 +130,12 @@ def _can_insert_flight_for_resource(cursor, existing_flights, new_dep, new_origi
         if last_before["arrival"] + travel_time > new_dep:
             # Not enough time to move from previous destination to new origin
             return False
-    else:
-        # No previous flights -> resource starts at BASE_AIRPORT
-        travel_time = _travel_time_between(cursor, BASE_AIRPORT, new_origin)
-        if travel_time is None:
-            # No route from base to origin -> treat as instant transfer
-            travel_time = timedelta(minutes=0)
-        # No arrival check needed because there is no prior flight
+    # No previous flights -> resource starts at BASE_AIRPORT, no arrival check needed
 
     # 2B) Check transfer from new flight -> next flight
     if first_after:
         next_loc = first_after["origin"]
-        travel_time = _travel_time_between(cursor, new_dest, next_loc)
+        travel_time = _travel_time_between(new_dest, next_loc)
 
         # No route -> treat as instant transfer
         if travel_time is None:
@@ -208,8 +183,14 @@ def get_required_crew_by_plane(plane_id):
     if not row:
         return 3, 2  # default small plane
 
-    size = row["size"].lower()
-    if size == "large":
+    return get_required_crew_by_size(row["size"])
+
+
+def get_required_crew_by_size(size):
+    """
+    Returns required_attendants, required_pilots for a plane size ('small' / 'large').
+    """
+    if (size or "").lower() == "large":
         return 6, 3
     else:  # small plane
         return 3, 2
@@ -240,7 +221,7 @@ def get_available_planes(origin, destination, departure_datetime):
     cursor = conn.cursor(dictionary=True)
 
     # Compute new flight duration and type
-    minutes = _get_flight_duration_minutes(cursor, origin, destination)
+    minutes = _get_flight_duration_minutes(origin, destination)
     if minutes is None:
         cursor.close()
         conn.close()
@@ -250,59 +231,56 @@ def get_available_planes(origin, destination, departure_datetime):
 
     # Size constraint: long flights must use large planes
     if is_long_flight:
-        size_condition = "size = 'large'"
+        size_condition = "p.size = 'large'"
     else:
-        size_condition = "size IN ('small', 'large')"
+        size_condition = "p.size IN ('small', 'large')"
 
-    # Fetch all planes that match the size condition
+    # Fetch all planes that match the size condition, with their total seats
     cursor.execute(f"""
         SELECT p.plane_id,
                p.size,
-               p.producer
+               p.producer,
+               COALESCE(SUM(pc.rows_number * pc.columns_number), 0) AS total_seats
         FROM Planes p
+        LEFT JOIN Plane_Class pc ON pc.plane_id = p.plane_id
         WHERE {size_condition}
+        GROUP BY p.plane_id, p.size, p.producer
     """)
     planes_rows = cursor.fetchall()
 
+    # Existing flights of all planes, in one query
+    schedules = get_resource_schedules(cursor, "plane")
+    positions = get_positions_at("plane", departure_datetime, inclusive=False, cursor=cursor)
+
     available = []
 
     for p in planes_rows:
         plane_id = p["plane_id"]
 
         # Existing flights for this plane
-        flights = _get_resource_flights(cursor, plane_id=plane_id)
+        schedule = schedules.get(plane_id) or ResourceSchedule()
 
         # Check if we can assign the new flight to this plane
-        if not _can_insert_flight_for_resource(cursor, flights, departure_datetime, origin, destination):
+        if not can_insert_flight_for_resource(schedule, departure_datetime, origin, destination):
             continue
 
-        # Find last flight before the new flight, if any
-        before = [fl for fl in flights if fl["arrival"] < departure_datetime]
-        last_flight = max(before, key=lambda x: x["arrival"]) if before else None
+        # Last flight before the new flight, if any (position ledger)
+        last_flight = positions.get(plane_id)
 
         if last_flight:
             last_origin = last_flight["origin"]
-            last_destination = last_flight["destination"]
-            last_arrival = last_flight["arrival"]
+            last_destination = last_flight["location"]
+            last_arrival = last_flight["free_from"]
         else:
             last_origin = BASE_AIRPORT
             last_destination = None
             last_arrival = None
 
-        # Compute total seats for the plane
-        cursor.execute("""
-            SELECT SUM(pc.rows_number * pc.columns_number) AS total_seats
-            FROM Plane_Class pc
-            WHERE pc.plane_id = %s
-        """, (plane_id,))
-        seat_info = cursor.fetchone()
-        total_seats = seat_info["total_seats"] or 0
-
         available.append({
             "plane_id": plane_id,
             "producer": p["producer"],
             "size": p["size"],
-            "total_seats": total_seats,
+            "total_seats": p["total_seats"],
             "is_long_flight": is_long_flight,
             "last_origin": last_origin,
             "last_destination": last_destination,
@@ -352,7 +330,7 @@ def get_available_attendants(flight_datetime, origin=None, destination=None, is_
         return rows
 
     # Flight duration and "long flight" flag
-    minutes = _get_flight_duration_minutes(cursor, origin, destination)
+    minutes = _get_flight_duration_minutes(origin, destination)
     if minutes is None:
         cursor.close()
         conn.close()
@@ -374,6 +352,10 @@ def get_available_attendants(flight_datetime, origin=None, destination=None, is_
     """)
     attendants = cursor.fetchall()
 
+    # Existing flights of all attendants, in one query
+    schedules = get_resource_schedules(cursor, "attendant")
+    positions = get_positions_at("attendant", flight_datetime, inclusive=False, cursor=cursor)
+
     available = []
 
     for a in attendants:
@@ -387,19 +369,18 @@ def get_available_attendants(flight_datetime, origin=None, destination=None, is_
                 continue
 
         # All existing flights of this attendant
-        flights = _get_resource_flights(cursor, attendant_id=att_id)
+        schedule = schedules.get(att_id) or ResourceSchedule()
 
         # Check if he/she can be assigned
-        if not _can_insert_flight_for_resource(cursor, flights, flight_datetime, origin, destination):
+        if not can_insert_flight_for_resource(schedule, flight_datetime, origin, destination):
             continue
 
-        # Last flight before the new one (for display)
-        before = [fl for fl in flights if fl["arrival"] < flight_datetime]
-        last_flight = max(before, key=lambda x: x["arrival"]) if before else None
+        # Last flight before the new one (for display, position ledger)
+        last_flight = positions.get(att_id)
 
         if last_flight:
-            last_arrival = last_flight["arrival"]
-            last_destination = last_flight["destination"]
+            last_arrival = last_flight["free_from"]
+            last_destination = last_flight["location"]
         else:
             last_arrival = None
             last_destination = BASE_AIRPORT
@@ -448,7 +429,7 @@ def get_available_pilots(flight_datetime, origin=None, destination=None, is_long
         conn.close()
         return rows
 
-    minutes = _get_flight_duration_minutes(cursor, origin, destination)
+    minutes = _get_flight_duration_minutes(origin, destination)
     if minutes is None:
         cursor.close()
         conn.close()
@@ -469,6 +450,10 @@ def get_available_pilots(flight_datetime, origin=None, destination=None, is_long
     """)
     pilots = cursor.fetchall()
 
+    # Existing flights of all pilots, in one query
+    schedules = get_resource_schedules(cursor, "pilot")
+    positions = get_positions_at("pilot", flight_datetime, inclusive=False, cursor=cursor)
+
     available = []
 
     for p_row in pilots:
@@ -479,18 +464,17 @@ def get_available_pilots(flight_datetime, origin=None, destination=None, is_long
             if training_type not in ("long", "both"):
                 continue
 
-        flights = _get_resource_flights(cursor, pilot_id=pilot_id)
+        schedule = schedules.get(pilot_id) or ResourceSchedule()
 
-        if not _can_insert_flight_for_resource(cursor, flights, flight_datetime, origin, destination):
+        if not can_insert_flight_for_resource(schedule, flight_datetime, origin, destination):
             continue
 
-        before = [fl for fl in flights if fl["arrival"] < flight_datetime]
-        last_flight = max(before, key=lambda x: x["arrival"]) if before else None
+        last_flight = positions.get(pilot_id)
 
         if last_flight:
             last_origin = last_flight["origin"]
-            last_destination = last_flight["destination"]
-            last_arrival = last_flight["arrival"]
+            last_destination = last_flight["location"]
+            last_arrival = last_flight["free_from"]
         else:
             last_origin = BASE_AIRPORT
             last_destination = BASE_AIRPORT
@@ -0,0 +1,89 @@
+import os
+import re
+
+import mysql.connector
+
+from utils import get_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# MySQL errors that mean "this change is already in place"
+_ALREADY_APPLIED_ERRORS = {
+    1050,  # table already exists
+    1060,  # duplicate column name
+    1061,  # duplicate key (index) name
+    1826,  # duplicate foreign key constraint name
+}
+
+
+def split_statements(sql):
+    """Split a migration file into statements (comments removed)."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def list_migrations():
+    """Returns [(version, filename)] sorted by version, e.g. ('001', '001_x.sql')."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.match(r"^(\d+)_.*\.sql$", filename)
+        if match:
+            migrations.append((match.group(1), filename))
+    return migrations
+
+
+def apply_migrations(data_base="FLYTAU"):
+    """
+    Apply every migration that is not recorded in schema_migrations yet.
+    Safe to run repeatedly: applied versions are skipped, and statements whose
+    object already exists (e.g. an index created by hand) are ignored.
+    Returns the list of versions applied in this run.
+    """
+    conn = get_connection(data_base, request_scoped=False)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(20) PRIMARY KEY,
+                filename VARCHAR(255) NOT NULL,
+                applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)
+        """)
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+
+        newly_applied = []
+        for version, filename in list_migrations():
+            if version in applied:
+                continue
+
+            with open(os.path.join(MIGRATIONS_DIR, filename), encoding="utf-8") as f:
+                statements = split_statements(f.read())
+
+            for stmt in statements:
+                try:
+                    cursor.execute(stmt)
+                except mysql.connector.Error as e:
+                    if e.errno not in _ALREADY_APPLIED_ERRORS:
+                        conn.rollback()
+                        raise
+
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, filename) VALUES (%s, %s)",
+                (version, filename)
+            )
+            conn.commit()
+            newly_applied.append(version)
+            print("Applied migration", filename)
+
+        return newly_applied
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    # python migrate.py  -> bring an existing FLYTAU schema up to date
+    applied = apply_migrations()
+    if not applied:
+        print("Schema is up to date")
@@ -0,0 +1,28 @@
+-- =========================
+-- Per-flight seat inventory counters (see seat_inventory.py)
+-- =========================
+CREATE TABLE IF NOT EXISTS Flight_Inventory (
+    flight_id INT NOT NULL,
+    class_type VARCHAR(45) NOT NULL,
+    capacity INT NOT NULL,
+    sold INT NOT NULL DEFAULT 0,
+    held INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (flight_id, class_type),
+    FOREIGN KEY (flight_id) REFERENCES Flights(flight_id));
+
+-- Backfill existing flights (rows that already exist are left alone)
+INSERT IGNORE INTO Flight_Inventory (flight_id, class_type, capacity, sold, held)
+SELECT f.flight_id,
+       pc.class_type,
+       pc.rows_number * pc.columns_number,
+       COALESCE(b.sold, 0),
+       0
+FROM Flights f
+JOIN Plane_Class pc ON pc.plane_id = f.plane_id
+LEFT JOIN (
+    SELECT o.flight_id, bs.class_type, COUNT(*) AS sold
+    FROM Orders o
+    JOIN Booking_Seats bs ON bs.order_id = o.order_id
+    WHERE o.order_status IN ('ACTIVE', 'COMPLETED')
+    GROUP BY o.flight_id, bs.class_type
+) b ON b.flight_id = f.flight_id AND b.class_type = pc.class_type;
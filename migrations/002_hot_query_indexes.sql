@@ -0,0 +1,30 @@
+-- =========================
+-- Indexes for the hot query shapes
+-- =========================
+
+-- Flight search: origin + destination + departure range + status
+CREATE INDEX idx_flights_route_departure
+    ON Flights (origin, destination, departure_datetime, flight_status);
+
+-- Plane availability: a plane's flights by status, in departure order
+CREATE INDEX idx_flights_plane_status_departure
+    ON Flights (plane_id, flight_status, departure_datetime);
+
+-- Occupancy / refunds: orders of a flight by status
+CREATE INDEX idx_orders_flight_status
+    ON Orders (flight_id, order_status);
+
+-- My bookings: a registered customer's orders, newest first
+CREATE INDEX idx_orders_registered_date
+    ON Orders (registered_email, order_date);
+
+-- Guest booking lookup by email + booking code
+CREATE INDEX idx_orders_guest_email
+    ON Orders (guest_email, order_id);
+
+-- Crew schedules: reverse lookups by crew member
+CREATE INDEX idx_pilots_flights_pilot
+    ON PilotsFlights (pilot_id, flight_id);
+
+CREATE INDEX idx_attendants_flights_attendant
+    ON FlightAttendantsFlights (attendant_id, flight_id);
@@ -0,0 +1,5 @@
+-- =========================
+-- Cancel-flight page: keyset scan over upcoming flights by status
+-- =========================
+CREATE INDEX idx_flights_status_departure
+    ON Flights (flight_status, departure_datetime, flight_id);
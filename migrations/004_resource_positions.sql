@@ -0,0 +1,39 @@
+-- =========================
+-- Resource position ledger (see resource_positions.py)
+-- =========================
+CREATE TABLE IF NOT EXISTS Resource_Positions (
+    resource_type ENUM('plane','pilot','attendant') NOT NULL,
+    resource_id INT NOT NULL,
+    flight_id INT NOT NULL,
+    origin VARCHAR(50) NOT NULL,
+    location VARCHAR(50) NOT NULL,
+    free_from DATETIME NOT NULL,
+    PRIMARY KEY (resource_type, resource_id, flight_id),
+    INDEX idx_positions_free_from (resource_type, resource_id, free_from),
+    INDEX idx_positions_flight (flight_id),
+    FOREIGN KEY (flight_id) REFERENCES Flights(flight_id));
+
+-- Backfill from existing (non-cancelled) flights and crew assignments.
+-- The only copy of this statement: resource_positions.rebuild_positions()
+-- re-runs it, and new databases get it from `python migrate.py`.
+-- Keep the status rule in sync with OCCUPYING_FLIGHT_FILTER.
+INSERT IGNORE INTO Resource_Positions (resource_type, resource_id, flight_id, origin, location, free_from)
+SELECT 'plane', f.plane_id, f.flight_id, f.origin, f.destination,
+       f.departure_datetime + INTERVAL ROUND(COALESCE(r.minutes, 0) * 60) SECOND
+FROM Flights f
+LEFT JOIN Route r ON r.origin = f.origin AND r.destination = f.destination
+WHERE f.flight_status <> 'Cancelled'
+UNION ALL
+SELECT 'pilot', pf.pilot_id, f.flight_id, f.origin, f.destination,
+       f.departure_datetime + INTERVAL ROUND(COALESCE(r.minutes, 0) * 60) SECOND
+FROM PilotsFlights pf
+JOIN Flights f ON f.flight_id = pf.flight_id
+LEFT JOIN Route r ON r.origin = f.origin AND r.destination = f.destination
+WHERE f.flight_status <> 'Cancelled'
+UNION ALL
+SELECT 'attendant', faf.attendant_id, f.flight_id, f.origin, f.destination,
+       f.departure_datetime + INTERVAL ROUND(COALESCE(r.minutes, 0) * 60) SECOND
+FROM FlightAttendantsFlights faf
+JOIN Flights f ON f.flight_id = faf.flight_id
+LEFT JOIN Route r ON r.origin = f.origin AND r.destination = f.destination
+WHERE f.flight_status <> 'Cancelled';
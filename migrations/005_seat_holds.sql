@@ -0,0 +1,13 @@
+-- =========================
+-- Seat holds during the booking funnel (see seat_holds.py)
+-- =========================
+CREATE TABLE IF NOT EXISTS Seat_Holds (
+    flight_id INT NOT NULL,
+    seat_number VARCHAR(10) NOT NULL,
+    class_type VARCHAR(20) NOT NULL,
+    hold_token CHAR(32) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (flight_id, seat_number),
+    INDEX idx_seat_holds_expires (expires_at),
+    INDEX idx_seat_holds_token (hold_token, flight_id),
+    FOREIGN KEY (flight_id) REFERENCES Flights(flight_id));
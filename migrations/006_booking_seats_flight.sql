@@ -0,0 +1,30 @@
+-- =========================
+-- Booking_Seats knows its flight (index-only taken-seat lookups)
+-- =========================
+-- flight_id / active are copied from the order, so "which seats are taken
+-- on flight X" no longer joins Orders. active_flight_id is flight_id for
+-- active rows and NULL otherwise; the unique index on it allows each seat
+-- to be sold only once per flight while cancelled rows are kept.
+ALTER TABLE Booking_Seats
+    ADD COLUMN flight_id INT NULL,
+    ADD COLUMN active TINYINT(1) NOT NULL DEFAULT 1;
+
+-- Backfill from Orders
+UPDATE Booking_Seats bs
+JOIN Orders o ON o.order_id = bs.order_id
+SET bs.flight_id = o.flight_id,
+    bs.active = o.order_status IN ('ACTIVE', 'COMPLETED');
+
+ALTER TABLE Booking_Seats
+    MODIFY flight_id INT NOT NULL;
+
+ALTER TABLE Booking_Seats
+    ADD COLUMN active_flight_id INT AS (IF(active = 1, flight_id, NULL)) STORED;
+
+-- Fails if a seat is already sold twice on a flight - cancel one of the
+-- orders first (SELECT active_flight_id, seat_number, COUNT(*) ... HAVING COUNT(*) > 1)
+CREATE UNIQUE INDEX uq_booking_seats_active_seat
+    ON Booking_Seats (active_flight_id, seat_number);
+
+ALTER TABLE Booking_Seats
+    ADD CONSTRAINT fk_booking_seats_flight FOREIGN KEY (flight_id) REFERENCES Flights(flight_id);
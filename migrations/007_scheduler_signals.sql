@@ -0,0 +1,10 @@
+-- =========================
+-- Cross-worker change signals (see flight_status.py)
+-- =========================
+-- notify_flights_changed() bumps the version after a commit; the status
+-- scheduler leader polls it with a primary-key lookup.
+CREATE TABLE IF NOT EXISTS Scheduler_Signals (
+    name VARCHAR(50) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0);
+
+INSERT IGNORE INTO Scheduler_Signals (name, version) VALUES ('flights_changed', 0);
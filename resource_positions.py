@@ -0,0 +1,151 @@
+import os
+
+from utils import get_connection
+from migrate import MIGRATIONS_DIR, split_statements
+
+
+# ==============================
+# Resource position ledger
+# ==============================
+# Resource_Positions keeps one row per (resource, flight) assignment:
+#   resource_type - 'plane' / 'pilot' / 'attendant'
+#   origin        - where the flight departed from
+#   location      - where the resource is once the flight lands (destination)
+#   free_from     - arrival time of the flight (resource is free from then)
+# "Where is X at time T" is the row with the latest free_from <= T, an
+# indexed lookup on (resource_type, resource_id, free_from).
+# The write helpers take the caller's cursor so the ledger commits (or rolls
+# back) together with the flight / crew change that caused it.
+
+POSITIONS_BATCH_SIZE = 500  # rows per multi-row INSERT
+
+# Flights that occupy their plane and crew. The ledger, the feasibility
+# checks (func_for_flights.get_resource_schedules, the SQL engine,
+# Flight.assign_crew) and the backfill in migrations/004 all use this rule.
+OCCUPYING_FLIGHT_FILTER = "f.flight_status <> 'Cancelled'"
+
+# The backfill statement lives in the migration only; rebuild re-runs it
+POSITIONS_MIGRATION = "004_resource_positions.sql"
+
+
+def add_positions(cursor, positions):
+    """
+    Record assignments in the ledger.
+    positions: iterable of (resource_type, resource_id, flight_id, origin, location, free_from)
+    """
+    positions = list(positions)
+    for i in range(0, len(positions), POSITIONS_BATCH_SIZE):
+        batch = positions[i:i + POSITIONS_BATCH_SIZE]
+        cursor.execute(
+            """
+            INSERT INTO Resource_Positions
+                (resource_type, resource_id, flight_id, origin, location, free_from)
+            VALUES """ + ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(batch)) + """
+            ON DUPLICATE KEY UPDATE
+                origin = VALUES(origin),
+                location = VALUES(location),
+                free_from = VALUES(free_from)
+            """,
+            [value for row in batch for value in row]
+        )
+
+
+def remove_flight_positions(cursor, flight_id):
+    """The flight was cancelled -> none of its resources are positioned by it."""
+    cursor.execute("DELETE FROM Resource_Positions WHERE flight_id = %s", (flight_id,))
+
+
+def get_positions_at(resource_type, moment, inclusive=True, cursor=None):
+    """
+    Last position of every resource of one type at the given moment:
+    the assignment with the latest free_from <= moment (< moment if not inclusive).
+    cursor: optional caller's cursor (dictionary=True), so the caller does not
+    hold a second pooled connection.
+
+    Returns {resource_id: {flight_id, origin, location, free_from}}.
+    Resources that never flew before the moment are missing (they are at the base).
+    """
+    op = "<=" if inclusive else "<"
+
+    own_conn = cursor is None
+    if own_conn:
+        conn = get_connection("FLYTAU")
+        cursor = conn.cursor(dictionary=True)
+    cursor.execute(f"""
+        SELECT rp.resource_id, rp.flight_id, rp.origin, rp.location, rp.free_from
+        FROM Resource_Positions rp
+        JOIN (
+            SELECT resource_id, MAX(free_from) AS free_from
+            FROM Resource_Positions
+            WHERE resource_type = %s AND free_from {op} %s
+            GROUP BY resource_id
+        ) last ON last.resource_id = rp.resource_id AND last.free_from = rp.free_from
+        WHERE rp.resource_type = %s
+        ORDER BY rp.resource_id, rp.flight_id
+    """, (resource_type, moment, resource_type))
+    rows = cursor.fetchall()
+    if own_conn:
+        cursor.close()
+        conn.close()
+
+    # Same free_from for two flights -> the later flight_id wins
+    return {r["resource_id"]: r for r in rows}
+
+
+def get_position(resource_type, resource_id, moment, inclusive=True):
+    """Last position of one resource at the given moment, or None (at the base)."""
+    op = "<=" if inclusive else "<"
+
+    conn = get_connection("FLYTAU")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(f"""
+        SELECT resource_id, flight_id, origin, location, free_from
+        FROM Resource_Positions
+        WHERE resource_type = %s AND resource_id = %s AND free_from {op} %s
+        ORDER BY free_from DESC, flight_id DESC
+        LIMIT 1
+    """, (resource_type, resource_id, moment))
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    return row
+
+
+# ==============================
+# Rebuild
+# ==============================
+
+def _backfill_sql():
+    """The ledger backfill INSERT from migrations/004_resource_positions.sql."""
+    with open(os.path.join(MIGRATIONS_DIR, POSITIONS_MIGRATION), encoding="utf-8") as f:
+        statements = split_statements(f.read())
+    return next(stmt for stmt in statements if stmt.upper().startswith("INSERT"))
+
+
+def rebuild_positions():
+    """
+    Rebuild the whole ledger from Flights, PilotsFlights and
+    FlightAttendantsFlights (e.g. after a Route duration changed).
+    Returns the number of ledger rows written.
+    """
+    conn = get_connection("FLYTAU")
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("DELETE FROM Resource_Positions")
+        cursor.execute(_backfill_sql())
+        written = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    return written
+
+
+if __name__ == "__main__":
+    # python resource_positions.py  -> rebuild the ledger
+    print("Ledger rows written:", rebuild_positions())
@@ -0,0 +1,66 @@
+from bisect import bisect_left, bisect_right
+
+
+class ResourceSchedule:
+    """
+    Flights of one resource (plane / pilot / attendant), kept sorted so that
+    overlap, predecessor and successor lookups are O(log n).
+
+    Each flight is a dict with: flight_id, departure, arrival, origin, destination.
+
+    - by_departure / _departures: flights sorted by departure
+    - by_arrival / _arrivals:     flights sorted by arrival
+    - _max_arrival[i]:            latest arrival among by_departure[:i + 1]
+      (handles histories that contain overlapping flights)
+    """
+
+    def __init__(self, flights=()):
+        self.by_departure = sorted(flights, key=lambda fl: (fl["departure"], fl["flight_id"]))
+        self.by_arrival = sorted(self.by_departure, key=lambda fl: (fl["arrival"], fl["flight_id"]))
+        self._departures = [fl["departure"] for fl in self.by_departure]
+        self._arrivals = [fl["arrival"] for fl in self.by_arrival]
+        self._max_arrival = []
+        self._rebuild_max_arrival(0)
+
+    def __len__(self):
+        return len(self.by_departure)
+
+    def __iter__(self):
+        return iter(self.by_departure)
+
+    def _rebuild_max_arrival(self, start):
+        del self._max_arrival[start:]
+        latest = self._max_arrival[-1] if self._max_arrival else None
+        for fl in self.by_departure[start:]:
+            if latest is None or fl["arrival"] > latest:
+                latest = fl["arrival"]
+            self._max_arrival.append(latest)
+
+    def add(self, flight):
+        """Insert a flight, keeping both orderings."""
+        i = bisect_right(self._departures, flight["departure"])
+        self._departures.insert(i, flight["departure"])
+        self.by_departure.insert(i, flight)
+        self._rebuild_max_arrival(i)
+
+        j = bisect_right(self._arrivals, flight["arrival"])
+        self._arrivals.insert(j, flight["arrival"])
+        self.by_arrival.insert(j, flight)
+
+    def overlaps(self, departure, arrival):
+        """True if any flight satisfies: flight.departure < arrival and flight.arrival > departure."""
+        i = bisect_left(self._departures, arrival)
+        return i > 0 and self._max_arrival[i - 1] > departure
+
+    def last_before(self, moment, inclusive=True):
+        """Flight with the latest arrival <= moment (< moment if not inclusive), or None."""
+        if inclusive:
+            i = bisect_right(self._arrivals, moment)
+        else:
+            i = bisect_left(self._arrivals, moment)
+        return self.by_arrival[i - 1] if i > 0 else None
+
+    def first_after(self, moment):
+        """Flight with the earliest departure >= moment, or None."""
+        i = bisect_left(self._departures, moment)
+        return self.by_departure[i] if i < len(self.by_departure) else None
@@ -0,0 +1,136 @@
+import threading
+from types import MappingProxyType
+
+from utils import get_connection
+
+
+# ==============================
+# In-process Route catalog
+# ==============================
+# The Route table is tiny and almost never changes, so it is loaded once
+# per process and served from memory. Any code that writes to Route must
+# call invalidate_route_catalog() after committing.
+
+class RouteCatalog:
+    """
+    Immutable snapshot of the Route table.
+    - routes:       (origin, destination) -> minutes (read-only mapping)
+    - origins:      sorted tuple of distinct origins
+    - destinations: sorted tuple of distinct destinations
+    - version:      catalog version this snapshot was loaded for
+    - transfer:     all-pairs shortest repositioning time in minutes over the
+                    route graph (multi-hop), indexed via airport_index
+    """
+
+    __slots__ = ("routes", "origins", "destinations", "version",
+                 "airport_index", "transfer")
+
+    def __init__(self, routes, version):
+        self.routes = MappingProxyType(dict(routes))
+        self.origins = tuple(sorted({o for o, _ in routes if o}))
+        self.destinations = tuple(sorted({d for _, d in routes if d}))
+        self.version = version
+        self._build_transfer_matrix()
+
+    def _build_transfer_matrix(self):
+        """Floyd-Warshall over the (directed) Route graph. Built once per snapshot."""
+        airports = sorted({a for pair in self.routes for a in pair if a})
+        index = {airport: i for i, airport in enumerate(airports)}
+        n = len(airports)
+
+        inf = float("inf")
+        dist = [[inf] * n for _ in range(n)]
+        for i in range(n):
+            dist[i][i] = 0.0
+        for (origin, destination), minutes in self.routes.items():
+            if origin in index and destination in index and minutes is not None:
+                i, j = index[origin], index[destination]
+                dist[i][j] = min(dist[i][j], float(minutes))
+
+        for k in range(n):
+            dist_k = dist[k]
+            for i in range(n):
+                via = dist[i][k]
+                if via == inf:
+                    continue
+                row = dist[i]
+                for j in range(n):
+                    if via + dist_k[j] < row[j]:
+                        row[j] = via + dist_k[j]
+
+        self.airport_index = MappingProxyType(index)
+        self.transfer = tuple(tuple(row) for row in dist)
+
+    def minutes(self, origin, destination):
+        """Flight duration in minutes, or None if there is no such route."""
+        return self.routes.get((origin, destination))
+
+    def has_route(self, origin, destination):
+        return (origin, destination) in self.routes
+
+    def transfer_minutes(self, origin, destination):
+        """
+        Shortest repositioning time between two airports (possibly multi-hop).
+        Returns None if either airport is unknown or there is no path.
+        """
+        i = self.airport_index.get(origin)
+        j = self.airport_index.get(destination)
+        if i is None or j is None:
+            return None
+        minutes = self.transfer[i][j]
+        return None if minutes == float("inf") else minutes
+
+
+_catalog = None
+_version = 0
+_lock = threading.Lock()
+
+
+def _load(version):
+    # Independent connection: never cache another request's uncommitted rows
+    conn = get_connection("FLYTAU", request_scoped=False)
+    cursor = conn.cursor()
+    cursor.execute("SELECT origin, destination, minutes FROM Route")
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return RouteCatalog({(o, d): m for o, d, m in rows}, version)
+
+
+def get_route_catalog():
+    """Returns the current RouteCatalog, loading it on first use."""
+    global _catalog
+    catalog = _catalog
+    if catalog is not None and catalog.version == _version:
+        return catalog
+
+    version = _version
+    catalog = _load(version)
+    with _lock:
+        # Only install if nobody invalidated while we were loading
+        if version == _version:
+            _catalog = catalog
+    return catalog
+
+
+def get_route_minutes(origin, destination):
+    """Shortcut: duration in minutes for a route, or None."""
+    return get_route_catalog().minutes(origin, destination)
+
+
+def get_transfer_minutes(origin, destination):
+    """Shortcut: shortest repositioning time in minutes, or None if unreachable."""
+    return get_route_catalog().transfer_minutes(origin, destination)
+
+
+def get_route_catalog_version():
+    """Version counter; bumps on every invalidation. Other caches can key off it."""
+    return _version
+
+
+def invalidate_route_catalog():
+    """Drop the cached catalog. Call after any write to Route."""
+    global _catalog, _version
+    with _lock:
+        _version += 1
+        _catalog = None
@@ -0,0 +1,379 @@
+from datetime import date, datetime, timedelta
+
+from utils import get_connection, call_on_commit
+from route_catalog import get_route_minutes
+from flight_status import notify_flights_changed
+from availability_cache import invalidate_on_commit
+from crew_assignment import get_accumulated_hours, rank_crew_candidates
+from resource_positions import add_positions
+from func_for_flights import (
+    BASE_AIRPORT,
+    compute_arrival,
+    get_resource_schedules,
+    can_insert_flight_for_resource,
+    get_required_crew_by_size
+)
+from resource_schedule import ResourceSchedule
+
+
+# ==============================
+# Recurring flight schedules
+# ==============================
+# A season is generated in memory first: every resource schedule is loaded
+# once, and each placed flight is added to the schedules of its plane and
+# crew, so the next date already sees it. Only then are all flights written,
+# with multi-row inserts, in a single transaction on its own connection.
+# Before writing, the chosen planes and crew rows are locked (FOR UPDATE)
+# and the plan is re-validated against their current schedules, so two
+# concurrent runs (or a run and Flight.assign_crew) cannot double-book.
+
+INSERT_BATCH_SIZE = 500  # rows per multi-row INSERT
+
+
+def _recurring_dates(start_date, end_date, weekdays):
+    """Dates in [start_date, end_date] whose weekday (Mon=0 .. Sun=6) is in weekdays."""
+    weekdays = set(weekdays)
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in weekdays:
+            yield day
+        day += timedelta(days=1)
+
+
+def _load_resources(cursor):
+    """Planes and crew members with the fields the generator needs."""
+    cursor.execute("SELECT plane_id, size FROM Planes ORDER BY plane_id")
+    planes = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT pilot_id, CONCAT(first_name, ' ', last_name) AS full_name, training_type
+        FROM Pilots
+        ORDER BY pilot_id
+    """)
+    pilots = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT attendant_id, CONCAT(first_name, ' ', last_name) AS full_name, training_type
+        FROM FlightAttendants
+        ORDER BY attendant_id
+    """)
+    attendants = cursor.fetchall()
+
+    return planes, pilots, attendants
+
+
+def _feasible(resources, id_key, schedules, departure, origin, destination):
+    """Resources that can take the flight, with their last position (for ranking)."""
+    feasible = []
+    for r in resources:
+        schedule = schedules.get(r[id_key]) or ResourceSchedule()
+        if not can_insert_flight_for_resource(schedule, departure, origin, destination):
+            continue
+        last_flight = schedule.last_before(departure, inclusive=False)
+        feasible.append(dict(
+            r,
+            last_arrival=last_flight["arrival"] if last_flight else None,
+            last_destination=last_flight["destination"] if last_flight else BASE_AIRPORT
+        ))
+    return feasible
+
+
+def _pick_plane(planes, is_long_flight, origin):
+    """
+    Long flights need a large plane. Otherwise prefer a plane that is already
+    at the origin, then a small one (large planes are kept for long flights).
+    """
+    if is_long_flight:
+        planes = [p for p in planes if (p["size"] or "").lower() == "large"]
+    if not planes:
+        return None
+    return min(planes, key=lambda p: (
+        p["last_destination"] != origin,
+        (p["size"] or "").lower() == "large" and not is_long_flight,
+        p["plane_id"]
+    ))
+
+
+def plan_recurring_flights(origin, destination, weekdays, departure_time,
+                           start_date, end_date):
+    """
+    Plans a recurring schedule without writing anything.
+
+    weekdays:       iterable of weekday numbers (Mon=0 .. Sun=6)
+    departure_time: "HH:MM" or datetime.time
+
+    Returns:
+    {
+        planned:   [{departure_datetime, plane_id, plane_size, pilot_ids, attendant_ids}],
+        unstaffed: [{date, reason}]
+    }
+    """
+    if isinstance(start_date, str):
+        start_date = date.fromisoformat(start_date)
+    if isinstance(end_date, str):
+        end_date = date.fromisoformat(end_date)
+    if isinstance(departure_time, str):
+        departure_time = datetime.strptime(departure_time, "%H:%M").time()
+
+    minutes = get_route_minutes(origin, destination)
+    if minutes is None:
+        raise ValueError(f"Route {origin} -> {destination} not found")
+    is_long_flight = minutes > 360
+
+    conn = get_connection("FLYTAU")
+    cursor = conn.cursor(dictionary=True)
+
+    planes, pilots, attendants = _load_resources(cursor)
+    plane_schedules = get_resource_schedules(cursor, "plane")
+    pilot_schedules = get_resource_schedules(cursor, "pilot")
+    attendant_schedules = get_resource_schedules(cursor, "attendant")
+
+    cursor.close()
+    conn.close()
+
+    if is_long_flight:
+        pilots = [p for p in pilots if (p["training_type"] or "").lower() in ("long", "both")]
+        attendants = [a for a in attendants if (a["training_type"] or "").lower() in ("long", "both")]
+
+    # Loaded once, then kept up to date as flights are placed
+    hours = get_accumulated_hours()
+
+    planned = []
+    unstaffed = []
+
+    for day in _recurring_dates(start_date, end_date, weekdays):
+        departure = datetime.combine(day, departure_time)
+        if departure <= datetime.now():
+            unstaffed.append({"date": day, "reason": "departure is in the past"})
+            continue
+
+        plane = _pick_plane(
+            _feasible(planes, "plane_id", plane_schedules, departure, origin, destination),
+            is_long_flight, origin
+        )
+        if plane is None:
+            unstaffed.append({"date": day, "reason": "no available plane"})
+            continue
+
+        required_attendants, required_pilots = get_required_crew_by_size(plane["size"])
+
+        chosen_pilots = rank_crew_candidates(
+            _feasible(pilots, "pilot_id", pilot_schedules, departure, origin, destination),
+            "pilot", "pilot_id", origin, departure, is_long_flight, hours
+        )[:required_pilots]
+        if len(chosen_pilots) < required_pilots:
+            unstaffed.append({"date": day, "reason": "not enough pilots"})
+            continue
+
+        chosen_attendants = rank_crew_candidates(
+            _feasible(attendants, "attendant_id", attendant_schedules, departure, origin, destination),
+            "attendant", "attendant_id", origin, departure, is_long_flight, hours
+        )[:required_attendants]
+        if len(chosen_attendants) < required_attendants:
+            unstaffed.append({"date": day, "reason": "not enough attendants"})
+            continue
+
+        # Place the flight: the following dates see these resources as busy
+        placed = {
+            "flight_id": None,
+            "departure": departure,
+            "arrival": compute_arrival(departure, origin, destination),
+            "origin": origin,
+            "destination": destination
+        }
+        plane_schedules.setdefault(plane["plane_id"], ResourceSchedule()).add(placed)
+        for p in chosen_pilots:
+            pilot_schedules.setdefault(p["id"], ResourceSchedule()).add(placed)
+            hours[("pilot", p["id"])] = hours.get(("pilot", p["id"]), 0.0) + minutes / 60
+        for a in chosen_attendants:
+            attendant_schedules.setdefault(a["id"], ResourceSchedule()).add(placed)
+            hours[("attendant", a["id"])] = hours.get(("attendant", a["id"]), 0.0) + minutes / 60
+
+        planned.append({
+            "departure_datetime": departure,
+            "plane_id": plane["plane_id"],
+            "plane_size": plane["size"],
+            "pilot_ids": [p["id"] for p in chosen_pilots],
+            "attendant_ids": [a["id"] for a in chosen_attendants]
+        })
+
+    return {"planned": planned, "unstaffed": unstaffed}
+
+
+def _lock_resources(cursor, planned):
+    """
+    Lock the planes and crew members used by the plan, in a fixed order:
+    planes, then attendants, then pilots (crew in the same order as
+    Flight.assign_crew), ids ascending within each table.
+    """
+    for table, id_column, ids in (
+        ("Planes", "plane_id", {f["plane_id"] for f in planned}),
+        ("FlightAttendants", "attendant_id", {a for f in planned for a in f["attendant_ids"]}),
+        ("Pilots", "pilot_id", {p for f in planned for p in f["pilot_ids"]})
+    ):
+        ids = sorted(ids)
+        cursor.execute(f"""
+            SELECT {id_column}
+            FROM {table}
+            WHERE {id_column} IN ({", ".join(["%s"] * len(ids))})
+            ORDER BY {id_column}
+            FOR UPDATE
+        """, ids)
+        cursor.fetchall()
+
+
+def _plan_conflicts(cursor, planned, origin, destination):
+    """
+    Re-checks the plan against the schedules as they are now (call after
+    _lock_resources). Returns a list of conflict messages; empty = still valid.
+    """
+    schedules = {
+        resource_type: get_resource_schedules(cursor, resource_type)
+        for resource_type in ("plane", "pilot", "attendant")
+    }
+
+    conflicts = []
+    for f in planned:
+        departure = f["departure_datetime"]
+        resources = ([("plane", f["plane_id"])]
+                     + [("pilot", p) for p in f["pilot_ids"]]
+                     + [("attendant", a) for a in f["attendant_ids"]])
+
+        for resource_type, resource_id in resources:
+            schedule = schedules[resource_type].get(resource_id) or ResourceSchedule()
+            if not can_insert_flight_for_resource(schedule, departure, origin, destination):
+                conflicts.append(f"{resource_type} {resource_id} is no longer available on {departure}")
+
+        # Later flights of the plan see this one
+        placed = {
+            "flight_id": None,
+            "departure": departure,
+            "arrival": compute_arrival(departure, origin, destination),
+            "origin": origin,
+            "destination": destination
+        }
+        for resource_type, resource_id in resources:
+            schedules[resource_type].setdefault(resource_id, ResourceSchedule()).add(placed)
+
+    return conflicts
+
+
+def _insert_rows(cursor, sql_prefix, rows, placeholders):
+    """
+    Multi-row INSERT, INSERT_BATCH_SIZE rows per statement.
+    Returns the first auto-generated id (of the first batch).
+    """
+    first_id = None
+    for i in range(0, len(rows), INSERT_BATCH_SIZE):
+        batch = rows[i:i + INSERT_BATCH_SIZE]
+        cursor.execute(
+            sql_prefix + " VALUES " + ", ".join([placeholders] * len(batch)),
+            [value for row in batch for value in row]
+        )
+        if first_id is None:
+            first_id = cursor.lastrowid
+    return first_id
+
+
+def create_recurring_flights(origin, destination, weekdays, departure_time,
+                             start_date, end_date, regular_price, business_price=None):
+    """
+    Generates and saves a recurring schedule (plane + crew per flight),
+    all in one transaction.
+
+    Small planes have no business class, so their business_price is NULL.
+
+    Returns:
+    {
+        flight_ids: ids of the created flights (in departure order),
+        flights:    the planned flights with their flight_id,
+        unstaffed:  [{date, reason}] for dates that could not be staffed,
+        conflicts:  messages if a planned plane / crew member was booked
+                    meanwhile (nothing is written in that case)
+    }
+    """
+    plan = plan_recurring_flights(origin, destination, weekdays, departure_time,
+                                  start_date, end_date)
+    planned = plan["planned"]
+    if not planned:
+        return {"flight_ids": [], "flights": [], "unstaffed": plan["unstaffed"], "conflicts": []}
+
+    # Independent connection: committed or rolled back here, whatever the
+    # request does afterwards, and the locks are released right away
+    conn = get_connection("FLYTAU", request_scoped=False)
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        _lock_resources(cursor, planned)
+        conflicts = _plan_conflicts(cursor, planned, origin, destination)
+        if conflicts:
+            conn.rollback()
+            return {"flight_ids": [], "flights": [], "unstaffed": plan["unstaffed"],
+                    "conflicts": conflicts}
+
+        first_id = _insert_rows(cursor, """
+            INSERT INTO Flights (
+                departure_datetime, origin, destination, flight_status,
+                regular_price, business_price, plane_id
+            )
+        """, [
+            (f["departure_datetime"], origin, destination, "Scheduled", regular_price,
+             business_price if (f["plane_size"] or "").lower() == "large" else None,
+             f["plane_id"])
+            for f in planned
+        ], "(%s, %s, %s, %s, %s, %s, %s)")
+
+        # Generated ids are not guaranteed to be consecutive under concurrent
+        # inserts, so map them back by (plane, departure), unique per plane
+        cursor.execute("""
+            SELECT flight_id, plane_id, departure_datetime
+            FROM Flights
+            WHERE flight_id >= %s
+              AND origin = %s AND destination = %s
+              AND flight_status = 'Scheduled'
+        """, (first_id, origin, destination))
+        ids = {(r["plane_id"], r["departure_datetime"]): r["flight_id"] for r in cursor.fetchall()}
+
+        for f in planned:
+            f["flight_id"] = ids[(f["plane_id"], f["departure_datetime"])]
+        flight_ids = [f["flight_id"] for f in planned]
+
+        # Seat counters for all new flights, from their planes' classes
+        cursor.execute(f"""
+            INSERT INTO Flight_Inventory (flight_id, class_type, capacity, sold, held)
+            SELECT f.flight_id, pc.class_type, pc.rows_number * pc.columns_number, 0, 0
+            FROM Flights f
+            JOIN Plane_Class pc ON pc.plane_id = f.plane_id
+            WHERE f.flight_id IN ({", ".join(["%s"] * len(flight_ids))})
+        """, flight_ids)
+
+        _insert_rows(cursor, "INSERT INTO PilotsFlights (flight_id, pilot_id)",
+                     [(f["flight_id"], pid) for f in planned for pid in f["pilot_ids"]],
+                     "(%s, %s)")
+        _insert_rows(cursor, "INSERT INTO FlightAttendantsFlights (flight_id, attendant_id)",
+                     [(f["flight_id"], aid) for f in planned for aid in f["attendant_ids"]],
+                     "(%s, %s)")
+
+        positions = []
+        for f in planned:
+            arrival = compute_arrival(f["departure_datetime"], origin, destination)
+            positions.append(("plane", f["plane_id"], f["flight_id"], origin, destination, arrival))
+            positions.extend(("pilot", pid, f["flight_id"], origin, destination, arrival)
+                             for pid in f["pilot_ids"])
+            positions.extend(("attendant", aid, f["flight_id"], origin, destination, arrival)
+                             for aid in f["attendant_ids"])
+        add_positions(cursor, positions)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    invalidate_on_commit("plane", "crew")
+    call_on_commit(notify_flights_changed)
+
+    return {"flight_ids": flight_ids, "flights": planned, "unstaffed": plan["unstaffed"],
+            "conflicts": []}
@@ -0,0 +1,236 @@
+import threading
+from datetime import datetime, timedelta
+
+from mysql.connector import errorcode
+from mysql.connector.errors import IntegrityError
+
+from utils import get_connection
+from seat_inventory import add_held_seats, remove_held_seats, lock_flights, SeatConflictError
+from seat_occupancy import set_holds, drop_holds
+
+HOLD_TTL_SECONDS = 10 * 60      # how long a picked seat stays reserved
+SWEEP_INTERVAL_SECONDS = 60     # how often expired holds are removed
+
+
+# ==============================
+# Seat holds
+# ==============================
+# Seat_Holds has one row per held seat, keyed by (flight_id, seat_number),
+# so two customers can never hold the same seat. Each booking funnel owns
+# a hold_token (kept in its session). Every insert / delete of a hold also
+# updates Flight_Inventory.held in the same transaction, so search counts
+# held seats without touching this table. Expired holds stop blocking the
+# seat immediately and are removed by the sweeper.
+# Lock order is the same as checkout: the flight's inventory rows first
+# (lock_flights), then Seat_Holds.
+
+def _delete_holds(cursor, where, params):
+    """
+    Delete the holds matching `where` and release them from the inventory counters.
+    Returns the number of holds deleted.
+    """
+    # Find the flights without locking, lock them, then lock their holds
+    cursor.execute(f"SELECT DISTINCT flight_id FROM Seat_Holds WHERE {where}", params)
+    flight_ids = sorted(r["flight_id"] for r in cursor.fetchall())
+    if not flight_ids:
+        return 0
+    lock_flights(cursor, flight_ids)
+
+    cursor.execute(f"""
+        SELECT flight_id, seat_number, class_type
+        FROM Seat_Holds
+        WHERE ({where})
+          AND flight_id IN ({", ".join(["%s"] * len(flight_ids))})
+        FOR UPDATE
+    """, list(params) + flight_ids)
+    rows = cursor.fetchall()
+    if not rows:
+        return 0
+
+    by_flight = {}
+    for r in rows:
+        by_flight.setdefault(r["flight_id"], []).append(r)
+
+    for flight_id, holds in by_flight.items():
+        cursor.execute(f"""
+            DELETE FROM Seat_Holds
+            WHERE flight_id = %s
+              AND seat_number IN ({", ".join(["%s"] * len(holds))})
+        """, [flight_id] + [h["seat_number"] for h in holds])
+        remove_held_seats(cursor, flight_id, holds)
+
+    return len(rows)
+
+
+def release_token_holds(cursor, hold_token, flight_id=None):
+    """Release the holds of one booking funnel, using the caller's cursor (dictionary=True)."""
+    if flight_id is None:
+        return _delete_holds(cursor, "hold_token = %s", (hold_token,))
+    return _delete_holds(cursor, "hold_token = %s AND flight_id = %s", (hold_token, flight_id))
+
+
+def hold_seats(flight_id, seats, hold_token):
+    """
+    Reserve the given seats for HOLD_TTL_SECONDS.
+    seats: list of {seat_number, class_type}.
+
+    Replaces any previous holds of this token on the flight.
+    Raises SeatConflictError if a seat is sold or held by someone else.
+    """
+    seat_numbers = [s["seat_number"] for s in seats]
+
+    conn = get_connection("FLYTAU", request_scoped=False)
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        # Same lock order as checkout: the flight first, then its holds
+        lock_flights(cursor, [flight_id])
+
+        # The customer changed the selection -> drop the old holds first
+        release_token_holds(cursor, hold_token, flight_id)
+
+        if seat_numbers:
+            placeholders = ", ".join(["%s"] * len(seat_numbers))
+
+            # Expired holds on these seats no longer count
+            _delete_holds(cursor, f"""
+                flight_id = %s AND seat_number IN ({placeholders}) AND expires_at < NOW()
+            """, [flight_id] + seat_numbers)
+
+            cursor.execute(f"""
+                SELECT seat_number
+                FROM Booking_Seats
+                WHERE active_flight_id = %s
+                  AND seat_number IN ({placeholders})
+            """, [flight_id] + seat_numbers)
+            sold = {r["seat_number"] for r in cursor.fetchall()}
+            if sold:
+                raise SeatConflictError(flight_id, sold)
+
+            # A live hold of another customer makes the insert fail on the primary key
+            cursor.execute(
+                "INSERT INTO Seat_Holds (flight_id, seat_number, class_type, hold_token, expires_at) VALUES "
+                + ", ".join(["(%s, %s, %s, %s, NOW() + INTERVAL %s SECOND)"] * len(seats)),
+                [v for s in seats
+                 for v in (flight_id, s["seat_number"], s["class_type"], hold_token, HOLD_TTL_SECONDS)]
+            )
+            add_held_seats(cursor, flight_id, seats)
+
+        conn.commit()
+    except IntegrityError as e:
+        conn.rollback()
+        if e.errno == errorcode.ER_DUP_ENTRY:
+            raise SeatConflictError(flight_id, _held_by_others(flight_id, seat_numbers, hold_token),
+                                    reason="seats_held") from e
+        raise
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    set_holds(flight_id, seat_numbers, hold_token,
+              datetime.now() + timedelta(seconds=HOLD_TTL_SECONDS))
+
+
+def _held_by_others(flight_id, seat_numbers, hold_token):
+    conn = get_connection("FLYTAU", request_scoped=False)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT seat_number
+        FROM Seat_Holds
+        WHERE flight_id = %s
+          AND seat_number IN ({", ".join(["%s"] * len(seat_numbers))})
+          AND hold_token <> %s
+    """, [flight_id] + seat_numbers + [hold_token])
+    held = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    conn.close()
+    return held or set(seat_numbers)
+
+
+def release_holds(hold_token, flight_id=None):
+    """Release the holds of a booking funnel (logout, new search, ...)."""
+    conn = get_connection("FLYTAU", request_scoped=False)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        released = release_token_holds(cursor, hold_token, flight_id)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    drop_holds(hold_token, flight_id)
+    return released
+
+
+def get_held_seats_for_flight(flight_id, exclude_token=None):
+    """Seat numbers with a live hold on the flight (optionally not counting one token's holds)."""
+    conn = get_connection("FLYTAU")
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT seat_number
+        FROM Seat_Holds
+        WHERE flight_id = %s
+          AND expires_at >= NOW()
+          AND hold_token <> %s
+    """, (flight_id, exclude_token or ""))
+    held = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    conn.close()
+    return held
+
+
+# ==============================
+# Expiry sweeper
+# ==============================
+
+def sweep_expired_holds():
+    """Remove expired holds and give their seats back to the inventory."""
+    conn = get_connection("FLYTAU", request_scoped=False)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        removed = _delete_holds(cursor, "expires_at < NOW()", ())
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return removed
+
+
+class HoldSweeper(threading.Thread):
+    """
+    Background thread that removes expired holds every `interval` seconds.
+    Safe to run in several workers: deleted rows are locked, so each
+    expired hold is released exactly once.
+    """
+
+    def __init__(self, interval=SWEEP_INTERVAL_SECONDS):
+        super().__init__(name="seat-hold-sweeper", daemon=True)
+        self.interval = interval
+        self._stopping = threading.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    def run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                sweep_expired_holds()
+            except Exception as e:
+                print("Seat hold sweeper error:", e)
+
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def start_hold_sweeper(**kwargs):
+    """Start the expiry sweeper for this process (once)."""
+    global _sweeper
+    with _sweeper_lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper = HoldSweeper(**kwargs)
+            _sweeper.start()
+    return _sweeper
@@ -0,0 +1,219 @@
+from collections import Counter
+
+from utils import get_connection
+
+
+# ==============================
+# Per-flight seat inventory
+# ==============================
+# Flight_Inventory keeps one row per (flight_id, class_type):
+#   capacity - seats in that class of the flight's plane
+#   sold     - seats held by ACTIVE / COMPLETED orders
+#   held     - seats temporarily reserved during the booking funnel
+#              (until the sweeper runs it may still count expired holds, so
+#              readers subtract those - see EXPIRED_HOLDS_BY_FLIGHT)
+# The write helpers take the caller's cursor so they commit (or roll back)
+# together with the booking change that caused them.
+
+class SeatConflictError(ValueError):
+    """Some of the requested seats are no longer available on the flight."""
+
+    def __init__(self, flight_id, seat_numbers, reason="seats_taken"):
+        self.flight_id = flight_id
+        self.seat_numbers = sorted(seat_numbers)
+        self.reason = reason
+        super().__init__(f"Seats not available on flight {flight_id}: {', '.join(self.seat_numbers)}")
+
+    def to_dict(self):
+        return {
+            "error": "seat_conflict",
+            "reason": self.reason,
+            "flight_id": self.flight_id,
+            "seat_numbers": self.seat_numbers
+        }
+
+
+def lock_flights(cursor, flight_ids):
+    """
+    Lock the flights and their inventory rows (FOR UPDATE), in flight_id order.
+    Every transaction that touches a flight's seats (checkout, holds, sweeper)
+    takes this lock first, so they queue up instead of deadlocking.
+    cursor must be dictionary=True. Returns {flight_id: flight_status}.
+    """
+    flight_ids = sorted(set(flight_ids))
+    if not flight_ids:
+        return {}
+    cursor.execute(f"""
+        SELECT f.flight_id, f.flight_status
+        FROM Flights f
+        JOIN Flight_Inventory fi ON fi.flight_id = f.flight_id
+        WHERE f.flight_id IN ({", ".join(["%s"] * len(flight_ids))})
+        ORDER BY f.flight_id, fi.class_type
+        FOR UPDATE
+    """, flight_ids)
+    return {row["flight_id"]: row["flight_status"] for row in cursor.fetchall()}
+
+
+def init_flight_inventory(cursor, flight_id, plane_id):
+    """Create the inventory rows for a new flight from its plane's classes."""
+    cursor.execute("""
+        INSERT INTO Flight_Inventory (flight_id, class_type, capacity, sold, held)
+        SELECT %s, pc.class_type, pc.rows_number * pc.columns_number, 0, 0
+        FROM Plane_Class pc
+        WHERE pc.plane_id = %s
+        ON DUPLICATE KEY UPDATE capacity = VALUES(capacity)
+    """, (flight_id, plane_id))
+
+
+def add_sold_seats(cursor, flight_id, seats):
+    """
+    Increase 'sold' for each class of the given seats.
+    seats: iterable of dicts with a 'class_type' key.
+    """
+    for class_type, count in Counter(s["class_type"] for s in seats).items():
+        cursor.execute("""
+            UPDATE Flight_Inventory
+            SET sold = sold + %s
+            WHERE flight_id = %s AND class_type = %s
+        """, (count, flight_id, class_type))
+
+
+def remove_sold_seats(cursor, flight_id, seats):
+    """Decrease 'sold' for each class of the given seats (never below zero)."""
+    for class_type, count in Counter(s["class_type"] for s in seats).items():
+        cursor.execute("""
+            UPDATE Flight_Inventory
+            SET sold = GREATEST(sold - %s, 0)
+            WHERE flight_id = %s AND class_type = %s
+        """, (count, flight_id, class_type))
+
+
+def clear_sold_seats(cursor, flight_id):
+    """All orders of the flight were cancelled -> nothing is sold."""
+    cursor.execute("""
+        UPDATE Flight_Inventory
+        SET sold = 0
+        WHERE flight_id = %s
+    """, (flight_id,))
+
+
+def add_held_seats(cursor, flight_id, seats):
+    """Increase 'held' for each class of the given seats (new seat holds)."""
+    for class_type, count in Counter(s["class_type"] for s in seats).items():
+        cursor.execute("""
+            UPDATE Flight_Inventory
+            SET held = held + %s
+            WHERE flight_id = %s AND class_type = %s
+        """, (count, flight_id, class_type))
+
+
+def remove_held_seats(cursor, flight_id, seats):
+    """Decrease 'held' for each class of the given seats (never below zero)."""
+    for class_type, count in Counter(s["class_type"] for s in seats).items():
+        cursor.execute("""
+            UPDATE Flight_Inventory
+            SET held = GREATEST(held - %s, 0)
+            WHERE flight_id = %s AND class_type = %s
+        """, (count, flight_id, class_type))
+
+
+# Expired holds not swept yet, per flight (range scan on idx_seat_holds_expires;
+# the sweeper keeps this to at most one sweep interval of holds)
+EXPIRED_HOLDS_BY_FLIGHT = """
+    SELECT flight_id, COUNT(*) AS expired_holds
+    FROM Seat_Holds
+    WHERE expires_at < NOW()
+    GROUP BY flight_id
+"""
+
+
+def get_flight_inventory(flight_id):
+    """
+    Returns {class_type: {capacity, sold, held, available}} for a flight.
+    Primary-key lookup on Flight_Inventory; 'held' counts live holds only.
+    """
+    conn = get_connection("FLYTAU")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT fi.class_type, fi.capacity, fi.sold,
+               GREATEST(fi.held - COALESCE(eh.expired_holds, 0), 0) AS held
+        FROM Flight_Inventory fi
+        LEFT JOIN (
+            SELECT class_type, COUNT(*) AS expired_holds
+            FROM Seat_Holds
+            WHERE flight_id = %s AND expires_at < NOW()
+            GROUP BY class_type
+        ) eh ON eh.class_type = fi.class_type
+        WHERE fi.flight_id = %s
+    """, (flight_id, flight_id))
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    return {
+        row["class_type"]: {
+            "capacity": row["capacity"],
+            "sold": row["sold"],
+            "held": row["held"],
+            "available": row["capacity"] - row["sold"] - row["held"]
+        }
+        for row in rows
+    }
+
+
+def get_available_seats(flight_id):
+    """Total free seats on a flight (all classes)."""
+    return sum(c["available"] for c in get_flight_inventory(flight_id).values())
+
+
+# ==============================
+# Reconcile
+# ==============================
+
+def reconcile_inventory(flight_id=None):
+    """
+    Rebuild the counters from the source tables (Flights, Plane_Class,
+    Booking_Seats). 'held' is left untouched.
+    If flight_id is given only that flight is rebuilt.
+    Returns the number of inventory rows written.
+    """
+    conn = get_connection("FLYTAU")
+    cursor = conn.cursor()
+
+    flight_filter = "WHERE f.flight_id = %s" if flight_id is not None else ""
+    params = (flight_id,) if flight_id is not None else ()
+
+    try:
+        cursor.execute(f"""
+            INSERT INTO Flight_Inventory (flight_id, class_type, capacity, sold, held)
+            SELECT f.flight_id,
+                   pc.class_type,
+                   pc.rows_number * pc.columns_number,
+                   COALESCE(b.sold, 0),
+                   0
+            FROM Flights f
+            JOIN Plane_Class pc ON pc.plane_id = f.plane_id
+            LEFT JOIN (
+                SELECT flight_id, class_type, COUNT(*) AS sold
+                FROM Booking_Seats
+                WHERE active = 1
+                GROUP BY flight_id, class_type
+            ) b ON b.flight_id = f.flight_id AND b.class_type = pc.class_type
+            {flight_filter}
+            ON DUPLICATE KEY UPDATE capacity = VALUES(capacity), sold = VALUES(sold)
+        """, params)
+        written = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    return written
+
+
+if __name__ == "__main__":
+    # python seat_inventory.py  -> rebuild all counters
+    print("Inventory rows written:", reconcile_inventory())
@@ -0,0 +1,132 @@
+import threading
+from types import MappingProxyType
+
+from utils import get_connection
+
+
+# ==============================
+# Cached seat layouts per plane
+# ==============================
+# A plane's seats never change once it is configured, so its layout is
+# loaded once per process and shared by every request. Layouts are
+# immutable: seats are __slots__ objects and collections are tuples /
+# read-only mappings. seat.position is the seat's bit in the occupancy
+# bitmaps (see seat_occupancy.py). Planes.save_to_db invalidates the
+# plane's layout.
+
+class _Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+
+class LayoutSeat(_Frozen):
+    """One seat of a plane layout."""
+
+    __slots__ = ("seat_number", "row_number", "column_letter", "class_type", "position")
+
+    def __init__(self, seat_number, row_number, column_letter, class_type, position):
+        for name, value in (("seat_number", seat_number), ("row_number", row_number),
+                            ("column_letter", column_letter), ("class_type", class_type),
+                            ("position", position)):
+            object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        return f"LayoutSeat({self.seat_number!r}, {self.class_type!r})"
+
+
+class SeatLayout(_Frozen):
+    """
+    All seats of one plane, in (row, column) order.
+    - seats:        tuple of LayoutSeat (seats[i].position == i)
+    - rows:         row_number -> tuple of LayoutSeat (read-only, in row order)
+    - seat_numbers: tuple of seat numbers, same order as seats
+    - positions:    seat_number -> position (read-only)
+    """
+
+    __slots__ = ("plane_id", "seats", "rows", "seat_numbers", "positions")
+
+    def __init__(self, plane_id, rows):
+        seats = tuple(
+            LayoutSeat(r["seat_number"], r["rownumber"], r["column_letter"], r["class_type"], i)
+            for i, r in enumerate(rows)
+        )
+        grouped = {}
+        for seat in seats:
+            grouped.setdefault(seat.row_number, []).append(seat)
+
+        object.__setattr__(self, "plane_id", plane_id)
+        object.__setattr__(self, "seats", seats)
+        object.__setattr__(self, "rows", MappingProxyType(
+            {row: tuple(row_seats) for row, row_seats in grouped.items()}))
+        object.__setattr__(self, "seat_numbers", tuple(s.seat_number for s in seats))
+        object.__setattr__(self, "positions", MappingProxyType(
+            {s.seat_number: s.position for s in seats}))
+
+    def __len__(self):
+        return len(self.seats)
+
+    def __iter__(self):
+        return iter(self.seats)
+
+    def get(self, seat_number):
+        position = self.positions.get(seat_number)
+        return None if position is None else self.seats[position]
+
+    def bits_for(self, seat_numbers):
+        """Bitmap with the bits of the given seats set (unknown seats are ignored)."""
+        bits = 0
+        for s in seat_numbers:
+            position = self.positions.get(s)
+            if position is not None:
+                bits |= 1 << position
+        return bits
+
+
+_layouts = {}
+_version = 0
+_lock = threading.Lock()
+
+
+def get_seat_layout(plane_id):
+    """The plane's layout, loaded on first use (one query)."""
+    layout = _layouts.get(plane_id)
+    if layout is not None:
+        return layout
+
+    version = _version
+
+    # Independent connection: never cache another request's uncommitted rows
+    conn = get_connection("FLYTAU", request_scoped=False)
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT seat_number, rownumber, column_letter, class_type
+        FROM Seats
+        WHERE plane_id = %s
+        ORDER BY rownumber, column_letter
+    """, (plane_id,))
+    layout = SeatLayout(plane_id, cursor.fetchall())
+    cursor.close()
+    conn.close()
+
+    with _lock:
+        # Only install if nobody invalidated while we were loading;
+        # keep the first copy if another thread loaded it meanwhile
+        if version == _version:
+            layout = _layouts.setdefault(plane_id, layout)
+    return layout
+
+
+def invalidate_seat_layout(plane_id=None):
+    """Drop one plane's layout (or all). Call after changing a plane's seats or classes."""
+    global _version
+    with _lock:
+        _version += 1
+        if plane_id is None:
+            _layouts.clear()
+        else:
+            _layouts.pop(plane_id, None)
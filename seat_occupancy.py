@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from types import MappingProxyType
+
+from utils import get_connection
+from seat_layout import get_seat_layout
+
+OCCUPANCY_TTL_SECONDS = 30    # bounds staleness from other worker processes
+OCCUPANCY_MAX_FLIGHTS = 512   # flights kept in the per-process cache
+
+
+# ==============================
+# Per-flight seat occupancy bitmaps
+# ==============================
+# Every plane has a fixed seat order (its cached SeatLayout). A flight's
+# occupancy is an int used as a bitmap over that order: bit i set = the
+# seat at layout position i is sold.
+# Live holds are kept next to it as {position: (hold_token, expires_at)},
+# so expired holds stop counting without any write.
+# Entries are replaced, never mutated in place, so readers always see a
+# consistent snapshot. Bookings, cancellations and holds made in this
+# process update the cache right after they commit; the TTL picks up
+# changes made by other workers. The DB (holds primary key, checkout lock)
+# stays the authority - the bitmap only drives display and early checks.
+# The cache is keyed by int flight_id; every public function converts the
+# id it gets (session values may be strings).
+
+class FlightOccupancy:
+    """Immutable occupancy snapshot of one flight."""
+
+    __slots__ = ("flight_id", "layout", "sold", "holds", "loaded_at")
+
+    def __init__(self, flight_id, layout, sold, holds, loaded_at):
+        self.flight_id = flight_id
+        self.layout = layout
+        self.sold = sold
+        self.holds = MappingProxyType(dict(holds))
+        self.loaded_at = loaded_at
+
+    def _replace(self, sold=None, holds=None):
+        return FlightOccupancy(
+            self.flight_id, self.layout,
+            self.sold if sold is None else sold,
+            self.holds if holds is None else holds,
+            self.loaded_at
+        )
+
+    def taken_bits(self, exclude_token=None):
+        """Sold seats plus live holds of other customers, as a bitmap."""
+        bits = self.sold
+        if self.holds:
+            now = datetime.now()
+            for position, (token, expires_at) in self.holds.items():
+                if token != exclude_token and expires_at >= now:
+                    bits |= 1 << position
+        return bits
+
+    def is_taken(self, seat_number, exclude_token=None):
+        position = self.layout.positions.get(seat_number)
+        if position is None:
+            return False
+        return bool(self.taken_bits(exclude_token) >> position & 1)
+
+    def taken_seat_numbers(self, exclude_token=None):
+        bits = self.taken_bits(exclude_token)
+        return {s for i, s in enumerate(self.layout.seat_numbers) if bits >> i & 1}
+
+    def free_count(self, exclude_token=None):
+        return len(self.layout) - bin(self.taken_bits(exclude_token)).count("1")
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+def _load(flight_id, plane_id):
+    # Independent connection: never cache another request's uncommitted rows
+    conn = get_connection("FLYTAU", request_scoped=False)
+    cursor = conn.cursor(dictionary=True)
+
+    if plane_id is None:
+        cursor.execute("SELECT plane_id FROM Flights WHERE flight_id = %s", (flight_id,))
+        row = cursor.fetchone()
+        if not row:
+            cursor.close()
+            conn.close()
+            return None
+        plane_id = row["plane_id"]
+
+    loaded_at = time.monotonic()
+    # Sold seats: index-only scan of uq_booking_seats_active_seat
+    cursor.execute("""
+        SELECT 'sold' AS kind, seat_number, NULL AS hold_token, NULL AS expires_at
+        FROM Booking_Seats
+        WHERE active_flight_id = %s
+
+        UNION ALL
+
+        SELECT 'held', seat_number, hold_token, expires_at
+        FROM Seat_Holds
+        WHERE flight_id = %s
+          AND expires_at >= NOW()
+    """, (flight_id, flight_id))
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    layout = get_seat_layout(plane_id)
+    sold = layout.bits_for(r["seat_number"] for r in rows if r["kind"] == "sold")
+    holds = {
+        layout.positions[r["seat_number"]]: (r["hold_token"], r["expires_at"])
+        for r in rows
+        if r["kind"] == "held" and r["seat_number"] in layout.positions
+    }
+    return FlightOccupancy(flight_id, layout, sold, holds, loaded_at)
+
+
+def get_flight_occupancy(flight_id, plane_id=None):
+    """
+    Occupancy snapshot of a flight (cached per process).
+    Returns None if the flight does not exist.
+    """
+    flight_id = int(flight_id)
+    with _lock:
+        occupancy = _cache.get(flight_id)
+        if occupancy and time.monotonic() - occupancy.loaded_at < OCCUPANCY_TTL_SECONDS:
+            _cache.move_to_end(flight_id)
+            return occupancy
+
+    occupancy = _load(flight_id, plane_id)
+    if occupancy is None:
+        return None
+
+    with _lock:
+        _cache[flight_id] = occupancy
+        _cache.move_to_end(flight_id)
+        while len(_cache) > OCCUPANCY_MAX_FLIGHTS:
+            _cache.popitem(last=False)
+    return occupancy
+
+
+# -----------------------------
+# Updates (call after the change is committed)
+# -----------------------------
+def _update(flight_id, change):
+    flight_id = int(flight_id)
+    with _lock:
+        occupancy = _cache.get(flight_id)
+        if occupancy is not None:
+            _cache[flight_id] = change(occupancy)
+
+
+def mark_sold(flight_id, seat_numbers, hold_token=None):
+    """Seats were booked (their holds by hold_token become sold seats)."""
+    def change(occ):
+        holds = {p: h for p, h in occ.holds.items() if h[0] != hold_token} if hold_token else None
+        return occ._replace(sold=occ.sold | occ.layout.bits_for(seat_numbers), holds=holds)
+    _update(flight_id, change)
+
+
+def mark_free(flight_id, seat_numbers):
+    """Seats were released by a cancelled order."""
+    def change(occ):
+        return occ._replace(sold=occ.sold & ~occ.layout.bits_for(seat_numbers))
+    _update(flight_id, change)
+
+
+def set_holds(flight_id, seat_numbers, hold_token, expires_at):
+    """hold_token now holds exactly these seats on the flight."""
+    def change(occ):
+        holds = {p: h for p, h in occ.holds.items() if h[0] != hold_token}
+        for s in seat_numbers:
+            position = occ.layout.positions.get(s)
+            if position is not None:
+                holds[position] = (hold_token, expires_at)
+        return occ._replace(holds=holds)
+    _update(flight_id, change)
+
+
+def drop_holds(hold_token, flight_id=None):
+    """hold_token released its holds (on one flight, or everywhere)."""
+    def change(occ):
+        return occ._replace(holds={p: h for p, h in occ.holds.items() if h[0] != hold_token})
+
+    if flight_id is not None:
+        _update(flight_id, change)
+        return
+    with _lock:
+        for fid, occupancy in list(_cache.items()):
+            if any(h[0] == hold_token for h in occupancy.holds.values()):
+                _cache[fid] = change(occupancy)
+
+
+def invalidate_occupancy(flight_id=None):
+    """Drop one flight (or every flight) from the cache."""
+    with _lock:
+        if flight_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(int(flight_id), None)
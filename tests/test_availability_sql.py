@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("mysql.connector")
+
+from utils import get_connection
+from availability_sql import (
+    get_available_planes_sql,
+    get_available_attendants_sql,
+    get_available_pilots_sql
+)
+
+# Route and far-future departure from the sample data (database_schema.sql),
+# so every resource with a past flight has a last_arrival
+ORIGIN = "תל אביב - נתב״ג"
+DESTINATION = "לונדון"
+DEPARTURE = datetime(2030, 1, 1, 8, 0)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def sample_database():
+    try:
+        conn = get_connection("FLYTAU", request_scoped=False)
+    except Exception as e:
+        pytest.skip(f"FLYTAU database not available: {e}")
+    conn.close()
+
+
+def _assert_datetimes(rows, columns):
+    assert rows
+    for row in rows:
+        for column in columns:
+            if row[column] is not None:
+                assert isinstance(row[column], datetime), (column, row[column])
+    assert any(row["last_arrival"] is not None for row in rows)
+
+
+def test_planes_return_datetime_columns():
+    rows = get_available_planes_sql(ORIGIN, DESTINATION, DEPARTURE)
+    _assert_datetimes(rows, ["last_arrival"])
+
+
+def test_crew_return_datetime_columns():
+    _assert_datetimes(get_available_attendants_sql(DEPARTURE, ORIGIN, DESTINATION), ["last_arrival"])
+    _assert_datetimes(get_available_pilots_sql(DEPARTURE, ORIGIN, DESTINATION), ["last_arrival"])
@@ -0,0 +1,75 @@
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("mysql.connector")
+
+from utils import get_connection
+from Orders import Order
+from checkout import checkout
+from seat_inventory import remove_sold_seats
+from seat_occupancy import invalidate_occupancy
+
+
+@pytest.fixture
+def bookable_seat():
+    """A free seat on a future Scheduled flight of the sample database."""
+    try:
+        conn = get_connection("FLYTAU", request_scoped=False)
+    except Exception as e:
+        pytest.skip(f"FLYTAU database not available: {e}")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT f.flight_id, s.plane_id, s.class_type, s.seat_number
+        FROM Flights f
+        JOIN Seats s ON s.plane_id = f.plane_id
+        LEFT JOIN Booking_Seats bs
+               ON bs.active_flight_id = f.flight_id AND bs.seat_number = s.seat_number
+        LEFT JOIN Seat_Holds h
+               ON h.flight_id = f.flight_id AND h.seat_number = s.seat_number
+        WHERE f.flight_status = 'Scheduled'
+          AND f.departure_datetime > NOW()
+          AND bs.seat_number IS NULL
+          AND h.seat_number IS NULL
+        ORDER BY f.flight_id, s.rownumber, s.column_letter
+        LIMIT 1
+    """)
+    seat = cursor.fetchone()
+    cursor.execute("SELECT email FROM Guests LIMIT 1")
+    guest = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    if not seat or not guest:
+        pytest.skip("sample data has no bookable seat / guest")
+    return seat, guest["email"]
+
+
+def _delete_order(order, seat):
+    conn = get_connection("FLYTAU", request_scoped=False)
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("DELETE FROM Booking_Seats WHERE order_id = %s", (order.order_id,))
+    cursor.execute("DELETE FROM Orders WHERE order_id = %s", (order.order_id,))
+    remove_sold_seats(cursor, seat["flight_id"], [seat])
+    conn.commit()
+    cursor.close()
+    conn.close()
+    invalidate_occupancy(seat["flight_id"])
+
+
+def test_checkout_with_flight_id_from_form(bookable_seat):
+    seat, guest_email = bookable_seat
+
+    # book_flight -> session -> payment passes the id through the form
+    order = Order(total_amount=100, flight_id=str(seat["flight_id"]),
+                  order_status="ACTIVE", email_guest=guest_email)
+    order.seats.append({
+        "plane_id": seat["plane_id"],
+        "class_type": seat["class_type"],
+        "seat_number": seat["seat_number"]
+    })
+
+    try:
+        order_id = checkout(order)
+        assert order_id
+    finally:
+        if order.order_id:
+            _delete_order(order, seat)
@@ -1,16 +1,149 @@
-import mysql.connector
+import itertools
+import threading
 from datetime import datetime
-from flask import session
+from flask import session, g, has_request_context
+
+from db_pool import ConnectionPool
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "root",
+}
+
+# Connection pool settings (one pool per database)
+POOL_CONFIG = {
+    "size": 5,            # connections kept open while idle
+    "max_overflow": 10,   # extra connections allowed at peak
+    "timeout": 10,        # seconds to wait for a free connection
+    "recycle": 3600,      # seconds before a connection is replaced
+    "pre_ping": True,     # check liveness on checkout
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(data_base):
+    """Return the connection pool for the given database, creating it on first use."""
+    pool = _pools.get(data_base)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(data_base)
+            if pool is None:
+                pool = ConnectionPool(dict(DB_CONFIG, database=data_base), **POOL_CONFIG)
+                _pools[data_base] = pool
+    return pool
+
+
+class _RequestConnection:
+    """
+    Connection handed to model code during a request.
+    commit() and close() are no-ops: the request commits (or rolls back)
+    once at the end, and the pooled connection is released at teardown.
+    Each get_connection() call is one unit of work, started with a SAVEPOINT
+    when it opens its first cursor: rollback() undoes only that unit, never
+    the writes made earlier in the same request.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._savepoint = None
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def _execute(self, sql):
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(sql)
+        finally:
+            cursor.close()
+
+    def cursor(self, *args, **kwargs):
+        if self._savepoint is None:
+            self._savepoint = f"unit_{next(g.request_db_savepoints)}"
+            self._execute(f"SAVEPOINT {self._savepoint}")
+        # Several model calls share this connection, so never leave unread rows behind
+        kwargs.setdefault("buffered", True)
+        return self._conn.cursor(*args, **kwargs)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        if self._savepoint is not None:
+            self._execute(f"ROLLBACK TO SAVEPOINT {self._savepoint}")
+
+    def close(self):
+        pass
+
 
 #connection to mysql
-def get_connection(data_base):
-    conn = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="root",
-        database= data_base
-    )
-    return conn
+def get_connection(data_base, request_scoped=True):
+    """
+    Check out a pooled connection.
+    conn.close() returns it to the pool instead of closing the socket.
+
+    Inside a Flask request (after init_request_db(app)) all calls share one
+    connection and one transaction, committed or rolled back at teardown.
+    Pass request_scoped=False to get an independent connection.
+    """
+    if request_scoped and has_request_context() and "request_db" in g:
+        conns = g.request_db
+        if data_base not in conns:
+            conns[data_base] = get_pool(data_base).get_connection()
+        return _RequestConnection(conns[data_base])
+
+    return get_pool(data_base).get_connection()
+
+
+def init_request_db(app):
+    """
+    Bind one connection + transaction per request to flask.g.
+    Commit after a successful request, roll back on error, release at teardown.
+    """
+
+    @app.before_request
+    def _open_request_db():
+        g.request_db = {}
+        g.request_db_on_commit = []
+        g.request_db_savepoints = itertools.count(1)
+
+    @app.after_request
+    def _commit_request_db(response):
+        # An error while committing propagates and is rolled back at teardown
+        if response.status_code < 500:
+            for conn in g.get("request_db", {}).values():
+                conn.commit()
+            for callback in g.pop("request_db_on_commit", []):
+                callback()
+        return response
+
+    @app.teardown_request
+    def _close_request_db(error=None):
+        for conn in g.pop("request_db", {}).values():
+            try:
+                # Release rolls back anything that was not committed
+                conn.close()
+            except Exception:
+                pass
+
+
+def call_on_commit(callback):
+    """
+    Run callback once the current request's transaction is committed.
+    Outside a request-scoped transaction it runs immediately.
+    """
+    if has_request_context() and "request_db_on_commit" in g:
+        g.request_db_on_commit.append(callback)
+    else:
+        callback()
+
+
+def get_pool_stats():
+    """Returns stats for every pool: in_use, idle, wait time and checkout count."""
+    return {name: pool.stats() for name, pool in _pools.items()}
 
 
 